@@ -2,8 +2,58 @@
 """
 Views module
 """
-from flask import Blueprint
+from flask import (Blueprint, Response, jsonify, request,
+                   stream_with_context, url_for)
+import json
+import models
+from os import getenv
 app_views = Blueprint("app_views", __name__, url_prefix="/api/v1")
+# int - the biggest ?limit= of a page
+max_limit = int(getenv("HBNB_API_MAX_LIMIT", 1000))
+
+
+def jsonify_stream(objs):
+    """returns a response sending the JSON list of the dictionaries of
+    objs as they are iterated, instead of building the whole list first"""
+    def generate():
+        """yields the JSON list one object at a time"""
+        separator = "\n"
+        yield "["
+        for obj in objs:
+            yield separator + json.dumps(obj.to_dict(), sort_keys=True)
+            separator = ",\n"
+        yield "\n]\n"
+    return Response(stream_with_context(generate()),
+                    mimetype="application/json")
+
+
+def paginated():
+    """tells if the request asks for a page with ?limit= or ?cursor="""
+    return "limit" in request.args or "cursor" in request.args
+
+
+def jsonify_page(cls, filters=None):
+    """returns a response with the JSON list of the page of objects of cls
+    whose attributes equal filters after ?cursor=, of ?limit= (100 by
+    default, max_limit at most) objects read by storage.page(), with the
+    cursor of the next page in the X-Next-Cursor and Link headers"""
+    limit = request.args.get("limit", "100")
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    limit = min(int(limit), max_limit)
+    try:
+        objs, cursor = models.storage.page(
+            cls, after=request.args.get("cursor"), limit=limit,
+            filters=filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify([obj.to_dict() for obj in objs])
+    if cursor is not None:
+        args = dict(request.view_args, limit=limit, cursor=cursor)
+        response.headers["X-Next-Cursor"] = cursor
+        response.headers["Link"] = '<{}>; rel="next"'.format(
+            url_for(request.endpoint, _external=True, **args))
+    return response
 
 from api.v1.views.index import *
 from api.v1.views.users import *
@@ -2,17 +2,16 @@
 """ web route that handles all default RestFul API actions for Amenities"""
 from models.amenity import Amenity
 from models import storage
-from api.v1.views import app_views
+from api.v1.views import app_views, jsonify_page, jsonify_stream, paginated
 from flask import abort, jsonify, request
 
 
 @app_views.route('/amenities', strict_slashes=False)
 def get_amenities():
     """ Retrieves a list of all amenities """
-    amenities = storage.all(Amenity).values()
-    list_amenities = [amenity.to_dict() for amenity in amenities]
-
-    return jsonify(list_amenities)
+    if paginated():
+        return jsonify_page(Amenity)
+    return jsonify_stream(storage.iter_all(Amenity))
 
 
 @app_views.route('/amenities/<amenity_id>', strict_slashes=False)
@@ -7,7 +7,7 @@ from flask import jsonify, abort, request
 from models import storage
 from models.city import City
 from models.state import State
-from api.v1.views import app_views
+from api.v1.views import app_views, jsonify_page, paginated
 
 
 @app_views.route('/states/<state_id>/cities', strict_slashes=False)
@@ -18,6 +18,9 @@ def get_state_cities(state_id):
     if not state:
         abort(404)
 
+    if paginated():
+        return jsonify_page(City, {"state_id": state_id})
+
     cities = [city.to_dict() for city in state.cities]
 
     return jsonify(cities)
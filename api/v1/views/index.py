@@ -25,8 +25,9 @@ def number_objects():
     classes = [Amenity, City, Place, Review, State, User]
     names = ["amenities", "cities", "places", "reviews", "states", "users"]
 
+    counts = storage.counts()
     num_objs = {}
     for i in range(len(classes)):
-        num_objs[names[i]] = storage.count(classes[i])
+        num_objs[names[i]] = counts[classes[i].__name__]
 
     return jsonify(num_objs)
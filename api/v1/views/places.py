@@ -6,7 +6,7 @@ from models.place import Place
 from models.user import User
 from models.amenity import Amenity
 from models import storage
-from api.v1.views import app_views
+from api.v1.views import app_views, jsonify_page, jsonify_stream, paginated
 from flask import abort, jsonify, request
 
 
@@ -20,6 +20,9 @@ def get_places(city_id):
     if not city:
         abort(404)
 
+    if paginated():
+        return jsonify_page(Place, {"city_id": city_id})
+
     places = [place.to_dict() for place in city.places]
 
     return jsonify(places)
@@ -133,14 +136,19 @@ def places_search():
             not states and
             not cities and
             not amenities):
-        places = storage.all(Place).values()
-        list_places = [place.to_dict() for place in places]
+        def places():
+            """yields the places of a snapshot of the storage"""
+            with storage.snapshot() as snapshot:
+                for place in snapshot.iter_all(Place):
+                    yield place
 
-        return jsonify(list_places)
+        return jsonify_stream(places())
 
     list_places = []
     if states:
-        states_obj = [storage.get(State, s_id) for s_id in states]
+        states_obj = [storage.get(State, s_id,
+                                  load=["cities.places.amenities"])
+                      for s_id in states]
         for state in states_obj:
             if state:
                 for city in state.cities:
@@ -149,7 +157,8 @@ def places_search():
                             list_places.append(place)
 
     if cities:
-        city_obj = [storage.get(City, c_id) for c_id in cities]
+        city_obj = [storage.get(City, c_id, load=["places.amenities"])
+                    for c_id in cities]
         for city in city_obj:
             if city:
                 for place in city.places:
@@ -157,12 +166,21 @@ def places_search():
                         list_places.append(place)
 
     if amenities:
-        if not list_places:
-            list_places = storage.all(Place).values()
         amenities_obj = [storage.get(Amenity, a_id) for a_id in amenities]
-        list_places = [place for place in list_places
-                       if all([am in place.amenities
-                               for am in amenities_obj])]
+
+        def has_amenities(place):
+            """tells if place has all the amenities asked for"""
+            return all([am in place.amenities for am in amenities_obj])
+
+        if list_places:
+            list_places = [place for place in list_places
+                           if has_amenities(place)]
+        else:
+            # all the places: filter a consistent set of them
+            with storage.snapshot() as snapshot:
+                list_places = [place for place in snapshot.all(
+                    Place, load=["amenities"]).values()
+                    if has_amenities(place)]
 
     places = []
     for p in list_places:
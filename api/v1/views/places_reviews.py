@@ -7,7 +7,7 @@ from models import storage
 from models.review import Review
 from models.place import Place
 from models.user import User
-from api.v1.views import app_views
+from api.v1.views import app_views, jsonify_page, paginated
 
 
 @app_views.route('/places/<place_id>/reviews', strict_slashes=False)
@@ -18,6 +18,9 @@ def get_place_reviews(place_id):
     if not place:
         abort(404)
 
+    if paginated():
+        return jsonify_page(Review, {"place_id": place_id})
+
     reviews = [review.to_dict() for review in place.reviews]
 
     return jsonify(reviews)
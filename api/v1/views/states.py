@@ -2,7 +2,7 @@
 """ methods to handle all default RESTFul API actions for States """
 from models.state import State
 from models import storage
-from api.v1.views import app_views
+from api.v1.views import app_views, jsonify_page, jsonify_stream, paginated
 from flask import abort, jsonify, request
 
 
@@ -11,10 +11,9 @@ def get_states():
     """
     Retrieves the list of all States
     """
-    states = storage.all(State).values()
-    list_states = [state.to_dict() for state in states]
-
-    return jsonify(list_states)
+    if paginated():
+        return jsonify_page(State)
+    return jsonify_stream(storage.iter_all(State))
 
 
 @app_views.route('/states/<state_id>', strict_slashes=False)
@@ -2,7 +2,7 @@
 """ methods to handle all default RESTFul API actions for Users """
 from models.user import User
 from models import storage
-from api.v1.views import app_views
+from api.v1.views import app_views, jsonify_page, jsonify_stream, paginated
 from flask import abort, jsonify, request
 
 
@@ -11,10 +11,9 @@ from flask import abort, jsonify, request
 def get_users(user_id=None):
     """ Retrieves a specific user """
     if not user_id:
-        users = storage.all(User).values()
-        list_users = [user.to_dict() for user in users]
-
-        return jsonify(list_users)
+        if paginated():
+            return jsonify_page(User)
+        return jsonify_stream(storage.iter_all(User))
 
     else:
         user = storage.get(User, user_id)
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Compares the size and the FileStorage.reload() time of a generated
+file.json and of the same objects converted to a binary file.hbnb
+
+usage: python3 -m benchmarks.binary_snapshot [number of records]
+"""
+
+from benchmarks.lazy_reload import generate
+from models.engine.binary_format import Schema, convert
+from models.engine.file_storage import classes
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = """
+import time
+import models
+from models.engine.file_storage import FileStorage
+FileStorage._FileStorage__file_path = {path!r}
+start = time.perf_counter()
+models.storage.reload()
+print(time.perf_counter() - start, models.storage.count())
+"""
+
+
+def measure(workdir, path, lazy):
+    """returns (seconds, objects) of a reload() of path in a new process"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(),
+               HBNB_FILE_LAZY="1" if lazy else "0")
+    env.pop("HBNB_TYPE_STORAGE", None)
+    env.pop("HBNB_FILE_FORMAT", None)
+    out = subprocess.check_output(
+        [sys.executable, "-c", CHILD.format(path=path)],
+        cwd=workdir, env=env)
+    seconds, count = out.split()
+    return float(seconds), int(count)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workdir = tempfile.mkdtemp()
+    json_path = os.path.join(workdir, "snapshot.json")
+    binary_path = os.path.join(workdir, "snapshot.hbnb")
+    generate(json_path, count)
+    start = time.perf_counter()
+    convert(json_path, binary_path, Schema.of(classes))
+    print("{} records converted in {:.2f}s".format(
+        count + 101, time.perf_counter() - start))
+    sizes = [os.path.getsize(path) for path in (json_path, binary_path)]
+    print("size: json {:.1f} MiB, binary {:.1f} MiB ({:.2f}x smaller)".format(
+        sizes[0] / 2 ** 20, sizes[1] / 2 ** 20, sizes[0] / sizes[1]))
+    for lazy in (False, True):
+        json_time, json_count = measure(workdir, json_path, lazy)
+        binary_time, binary_count = measure(workdir, binary_path, lazy)
+        assert json_count == binary_count
+        print("{:5} reload: json {:6.2f}s, binary {:6.2f}s ({:.2f}x "
+              "faster)".format("lazy" if lazy else "eager", json_time,
+                               binary_time, json_time / binary_time))
+    for path in (json_path, binary_path):
+        os.remove(path)
+    os.rmdir(workdir)
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Compares seeding places one save() at a time with storage.bulk_new()
+and storage.bulk_upsert(), with FileStorage (JSON, with and without the
+journal) and with SQLiteStorage
+
+The save() loop rewrites the file or commits for each place, so it only
+seeds the first [loop places] and its rate is reported.
+
+usage: python3 -m benchmarks.bulk_seed [places] [loop places]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import time
+import models
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+state = State(name="California")
+city = City(name="Napa", state_id=state.id)
+user = User(email="seed@hbnb.io", password="seed")
+models.storage.bulk_new([state, city, user])
+seeds = {{"city_id": city.id, "user_id": user.id}}
+start = time.perf_counter()
+for i in range({loop}):
+    Place(name="loop {{}}".format(i), **seeds).save()
+loop = time.perf_counter() - start
+places = [Place(name="bulk {{}}".format(i), **seeds)
+          for i in range({count})]
+start = time.perf_counter()
+models.storage.bulk_new(places)
+bulk = time.perf_counter() - start
+dicts = [dict(Place(**seeds).to_dict(), name="upsert {{}}".format(i))
+         for i in range({count})]
+start = time.perf_counter()
+models.storage.bulk_upsert(dicts)
+upsert = time.perf_counter() - start
+print({loop} / loop, {count} / bulk, {count} / upsert)
+"""
+
+
+def run(workdir, count, loop, env):
+    """returns the places per second of the save() loop, bulk_new and
+    bulk_upsert"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), **env)
+    for name in ("HBNB_FILE_LAZY", "HBNB_FILE_SHARDS", "HBNB_FILE_MMAP",
+                 "HBNB_FILE_FORMAT", "HBNB_DB_CACHE_SIZE"):
+        env.pop(name, None)
+    out = subprocess.check_output(
+        [sys.executable, "-c", CHILD.format(count=count, loop=loop)],
+        cwd=workdir, env=env, universal_newlines=True)
+    return [float(value) for value in out.split()]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    loop = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    configs = (("file", {"HBNB_TYPE_STORAGE": "file",
+                         "HBNB_FILE_JOURNAL": "0"}),
+               ("file+journal", {"HBNB_TYPE_STORAGE": "file",
+                                 "HBNB_FILE_JOURNAL": "1"}),
+               ("sqlite", {"HBNB_TYPE_STORAGE": "sqlite",
+                           "HBNB_SQLITE_PATH": "hbnb.db"}))
+    print("{} places in bulk, {} with save()".format(count, loop))
+    for name, env in configs:
+        workdir = tempfile.mkdtemp()
+        rates = run(workdir, count, loop, env)
+        print("{:12}: save() {:8.0f} places/s, bulk_new {:8.0f} places/s, "
+              "bulk_upsert {:8.0f} places/s".format(name, *rates))
+        shutil.rmtree(workdir)
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""
+Measures FileStorage.save() throughput with many concurrent writers
+
+usage: python3 -m benchmarks.concurrent_saves [writers] [saves per writer]
+"""
+
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def run(writers, saves, journal, window):
+    """runs the writers and prints the throughput they reached"""
+    FileStorage._FileStorage__journal = journal
+    FileStorage._FileStorage__group_window = window
+    before = storage.stats()
+
+    def writer():
+        """creates and saves places one by one"""
+        for i in range(saves):
+            Place(name="place {}".format(i)).save()
+    threads = [threading.Thread(target=writer) for i in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    after = storage.stats()
+    print("journal {:d} window {:.3f}s: {:8.1f} saves/s, {} saves, "
+          "{} writes".format(journal, window, writers * saves / elapsed,
+                             after["saves"] - before["saves"],
+                             after["writes"] - before["writes"]))
+
+
+if __name__ == "__main__":
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    FileStorage._FileStorage__file_path = os.path.join(tempfile.mkdtemp(),
+                                                       "file.json")
+    FileStorage._FileStorage__objects = {}
+    for i in range(20000):
+        storage.new(Place(name="seed {}".format(i)))
+    storage.save()
+    for journal in (False, True):
+        for window in (0, 0.001, 0.005):
+            run(writers, saves, journal, window)
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+"""
+Measures the request latency of DBStorage with the default connection
+pool and with a tuned one
+
+A SQLite file stands in for MySQL: each new connection sleeps for the
+given connect latency, like the TCP and authentication round trips of a
+MySQL handshake, and each query for 1 ms, like a round trip to the
+server. Every worker thread plays API requests: get() one
+object then close(), as the teardown of the API does. The first request
+of each worker is reported apart: it is the one that pays for the
+connection when the pool starts empty.
+
+usage: python3 -m benchmarks.db_pool [workers] [requests per worker]
+                                     [connect latency in ms]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+
+def connect(*args):
+    \"\"\"slows the new connections down like a MySQL handshake\"\"\"
+    time.sleep({latency})
+event.listen(Pool, "connect", connect)
+
+
+def query(*args):
+    \"\"\"slows the queries down like a round trip to the server\"\"\"
+    time.sleep(0.001)
+event.listen(Engine, "before_cursor_execute", query)
+
+import threading
+import models
+from models.state import State
+
+state = State(name="California")
+state.save()
+models.storage.close()
+latencies = []
+firsts = []
+
+
+def worker():
+    \"\"\"plays the requests of one client\"\"\"
+    for i in range({requests}):
+        start = time.perf_counter()
+        models.storage.get(State, state.id)
+        models.storage.close()
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        if i == 0:
+            firsts.append(elapsed)
+threads = [threading.Thread(target=worker) for i in range({workers})]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+latencies.sort()
+stats = models.storage.stats()
+print(latencies[len(latencies) // 2] * 1000,
+      latencies[len(latencies) * 99 // 100] * 1000, latencies[-1] * 1000,
+      max(firsts) * 1000, stats["connects"], stats["peak_checked_out"])
+"""
+
+
+def run(workdir, workers, requests, latency, pool):
+    """returns p50, p99, max, slowest first request (ms), connections
+    opened and peak checked out"""
+    path = os.path.join(workdir, "hbnb.db")
+    if os.path.exists(path):
+        os.remove(path)
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), HBNB_TYPE_STORAGE="db",
+               HBNB_DB_URL="sqlite:///" + path, **pool)
+    for name in list(env):
+        if name.startswith("HBNB_MYSQL_POOL_") and name not in pool:
+            del env[name]
+    out = subprocess.check_output(
+        [sys.executable, "-c",
+         CHILD.format(latency=latency, requests=requests, workers=workers)],
+        cwd=workdir, env=env, universal_newlines=True)
+    return [float(value) for value in out.split()]
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 20) / 1000
+    workdir = tempfile.mkdtemp()
+    size = str(workers)
+    configs = (("defaults", {}),
+               ("tuned", {"HBNB_MYSQL_POOL_SIZE": size,
+                          "HBNB_MYSQL_POOL_OVERFLOW": "0",
+                          "HBNB_MYSQL_POOL_RECYCLE": "3600",
+                          "HBNB_MYSQL_POOL_PRE_PING": "1",
+                          "HBNB_MYSQL_POOL_WARMUP": size}))
+    print("{} workers x {} requests, {:.0f} ms per connect".format(
+        workers, requests, latency * 1000))
+    for name, pool in configs:
+        p50, p99, top, first, connects, peak = run(workdir, workers,
+                                                   requests, latency, pool)
+        print("{:8}: p50 {:6.2f} ms, p99 {:7.2f} ms, max {:7.2f} ms, "
+              "slowest first request {:7.2f} ms, {:3.0f} connects, "
+              "{:3.0f} checked out at most".format(
+                  name, p50, p99, top, first, connects, peak))
+    shutil.rmtree(workdir)
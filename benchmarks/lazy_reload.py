@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Measures the startup time and peak RSS of FileStorage.reload() on a
+generated file.json, eager or lazy, with json.load() or streaming
+
+usage: python3 -m benchmarks.lazy_reload [number of records]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+CHILD = """
+import resource, time
+start = time.perf_counter()
+import models
+elapsed = time.perf_counter() - start
+models.storage.get(models.state.State, {state_id!r}).cities
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def generate(path, count):
+    """writes a file.json holding count places spread over a few cities"""
+    date = "2024-08-03T11:33:38.122059"
+    state_id = str(uuid.uuid4())
+    city_ids = [str(uuid.uuid4()) for i in range(100)]
+    with open(path, "w") as f:
+        f.write("{")
+        f.write('"State.{0}": {{"id": "{0}", "created_at": "{1}", '
+                '"updated_at": "{1}", "name": "California", '
+                '"__class__": "State"}}'.format(state_id, date))
+        for city_id in city_ids:
+            f.write(', "City.{0}": {{"id": "{0}", "created_at": "{1}", '
+                    '"updated_at": "{1}", "state_id": "{2}", "name": "C", '
+                    '"__class__": "City"}}'.format(city_id, date, state_id))
+        for i in range(count):
+            place_id = str(uuid.uuid4())
+            f.write(', ' + json.dumps("Place." + place_id) + ': ' +
+                    json.dumps({"id": place_id, "created_at": date,
+                                "updated_at": date,
+                                "city_id": city_ids[i % 100],
+                                "user_id": state_id,
+                                "name": "place {}".format(i),
+                                "number_rooms": i % 5,
+                                "price_by_night": 100,
+                                "__class__": "Place"}))
+        f.write("}")
+    return state_id
+
+
+def measure(workdir, state_id, lazy, stream):
+    """returns (seconds, peak RSS in KiB) of a process importing models"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(),
+               HBNB_FILE_LAZY="1" if lazy else "0",
+               HBNB_FILE_STREAM="1" if stream else "0",
+               HBNB_FILE_STREAM_SIZE="0")
+    env.pop("HBNB_TYPE_STORAGE", None)
+    out = subprocess.check_output(
+        [sys.executable, "-c", CHILD.format(state_id=state_id)],
+        cwd=workdir, env=env)
+    seconds, rss = out.split()
+    return float(seconds), int(rss)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "file.json")
+    state_id = generate(path, count)
+    print("{} records, {:.1f} MiB".format(count + 101,
+                                          os.path.getsize(path) / 2 ** 20))
+    for lazy in (False, True):
+        for stream in (False, True):
+            seconds, rss = measure(workdir, state_id, lazy, stream)
+            print("{:5} {:9}: import models {:7.2f}s, peak RSS {:8.1f} "
+                  "MiB".format("lazy" if lazy else "eager",
+                               "stream" if stream else "json.load",
+                               seconds, rss / 1024))
+    os.remove(path)
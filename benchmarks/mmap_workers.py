@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""
+Compares the memory of 8 worker processes reading the same binary
+snapshot with FileStorage and with the memory-mapped MmapStorage
+
+Each worker loads the storage, lists the cities of a state and counts
+the places, then reports its memory while all the workers are alive:
+RSS counts the shared pages of the snapshot in every worker, PSS splits
+them between the workers and Private counts what is not shared.
+
+usage: python3 -m benchmarks.mmap_workers [number of records] [workers]
+"""
+
+from benchmarks.lazy_reload import generate
+from models.engine.binary_format import Schema, convert
+from models.engine.file_storage import classes
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import sys
+import models
+from models.state import State
+state = models.storage.get(State, {state_id!r})
+cities = state.cities
+models.storage.count("Place")
+print("ready", flush=True)
+sys.stdin.readline()
+memory = {{}}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        fields = line.split()
+        if fields[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+            memory[fields[0]] = int(fields[1])
+print(memory["Rss:"], memory["Pss:"],
+      memory["Private_Clean:"] + memory["Private_Dirty:"])
+"""
+
+
+def run(workdir, state_id, mmap, workers):
+    """returns the (RSS, PSS, private) KiB of each worker"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(),
+               HBNB_FILE_MMAP="1" if mmap else "0",
+               HBNB_FILE_FORMAT="binary")
+    for name in ("HBNB_TYPE_STORAGE", "HBNB_FILE_LAZY", "HBNB_FILE_SHARDS"):
+        env.pop(name, None)
+    procs = [subprocess.Popen([sys.executable, "-c",
+                               CHILD.format(state_id=state_id)],
+                              cwd=workdir, env=env, stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE,
+                              universal_newlines=True)
+             for i in range(workers)]
+    for proc in procs:
+        assert proc.stdout.readline() == "ready\n"
+    results = []
+    for proc in procs:
+        out, err = proc.communicate("go\n")
+        results.append([int(value) for value in out.split()])
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    workdir = tempfile.mkdtemp()
+    json_path = os.path.join(workdir, "file.json")
+    state_id = generate(json_path, count)
+    convert(json_path, os.path.join(workdir, "file.hbnb"), Schema.of(classes))
+    os.remove(json_path)
+    print("{} records, {} workers".format(count + 101, workers))
+    for mmap in (False, True):
+        results = run(workdir, state_id, mmap, workers)
+        totals = [sum(column) / 1024 for column in zip(*results)]
+        print("{:11}: per worker RSS {:6.1f} MiB, PSS {:6.1f} MiB, private "
+              "{:6.1f} MiB; total PSS {:7.1f} MiB".format(
+                  "MmapStorage" if mmap else "FileStorage",
+                  totals[0] / workers, totals[1] / workers,
+                  totals[2] / workers, totals[1]))
+    shutil.rmtree(workdir)
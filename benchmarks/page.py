@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Compares reading one page of places with storage.page() with sorting
+all(Place) and slicing it, the first page and a page in the middle, with
+FileStorage (eager and lazy) and SQLiteStorage
+
+usage: python3 -m benchmarks.page [number of places] [page size]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+SEED = """
+import models
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+state = State(name="California")
+city = City(name="Napa", state_id=state.id)
+user = User(email="seed@hbnb.io", password="seed")
+models.storage.bulk_new([state, city, user])
+models.storage.bulk_new([Place(name="place {{}}".format(i), city_id=city.id,
+                               user_id=user.id) for i in range({count})])
+"""
+
+CHILD = """
+import time
+import models
+from models.place import Place
+timings = []
+
+
+def measure(function, repeat):
+    \"\"\"appends the mean seconds of function\"\"\"
+    start = time.perf_counter()
+    for i in range(repeat):
+        function()
+    timings.append((time.perf_counter() - start) / repeat)
+objs, after = models.storage.page(Place, limit={count} // 2)
+middle = objs[-1].id
+measure(lambda: models.storage.page(Place, limit={limit}), 20)
+measure(lambda: models.storage.page(Place, after=after, limit={limit}), 20)
+measure(lambda: sorted(models.storage.all(Place).values(),
+                       key=lambda obj: obj.id)[:{limit}], 3)
+measure(lambda: [obj for obj in sorted(models.storage.all(Place).values(),
+                                       key=lambda obj: obj.id)
+                 if obj.id > middle][:{limit}], 3)
+print(" ".join(str(timing) for timing in timings))
+"""
+
+
+def run(workdir, count, limit, env):
+    """returns the timings of each operation, in seconds"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), **env)
+    for name in ("HBNB_FILE_SHARDS", "HBNB_FILE_MMAP", "HBNB_FILE_FORMAT",
+                 "HBNB_FILE_JOURNAL", "HBNB_DB_CACHE_SIZE"):
+        env.pop(name, None)
+    subprocess.check_call(
+        [sys.executable, "-c", SEED.format(count=count)], cwd=workdir,
+        env=env)
+    out = subprocess.check_output(
+        [sys.executable, "-c", CHILD.format(count=count, limit=limit)],
+        cwd=workdir, env=env, universal_newlines=True)
+    return [float(value) for value in out.split()]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    print("pages of {} places among {}".format(limit, count))
+    for name, env in (("file", {"HBNB_TYPE_STORAGE": "file"}),
+                      ("file lazy", {"HBNB_TYPE_STORAGE": "file",
+                                     "HBNB_FILE_LAZY": "1"}),
+                      ("sqlite", {"HBNB_TYPE_STORAGE": "sqlite",
+                                  "HBNB_SQLITE_PATH": "hbnb.db"})):
+        workdir = tempfile.mkdtemp()
+        timings = run(workdir, count, limit, env)
+        print("{:9}: page() first {:8.2f} ms, middle {:8.2f} ms; sorted "
+              "all() first {:8.1f} ms, middle {:8.1f} ms".format(
+                  name, *(timing * 1e3 for timing in timings)))
+        shutil.rmtree(workdir)
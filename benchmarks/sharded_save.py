@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Compares a single file.json with one shard per class: time for a new
+process to get all the states, then to save a change to one of them
+
+usage: python3 -m benchmarks.sharded_save [number of records]
+"""
+
+from benchmarks.lazy_reload import generate
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import time
+start = time.perf_counter()
+import models
+from models.state import State
+states = models.storage.all(State)
+cold = time.perf_counter() - start
+list(states.values())[0].name = "Nevada"
+start = time.perf_counter()
+models.storage.save()
+print(cold, time.perf_counter() - start)
+"""
+
+
+def measure(workdir, sharded):
+    """returns the seconds to read the states and to save one change"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(),
+               HBNB_FILE_SHARDS="1" if sharded else "0")
+    for name in ("HBNB_TYPE_STORAGE", "HBNB_FILE_FORMAT",
+                 "HBNB_FILE_JOURNAL", "HBNB_FILE_LAZY"):
+        env.pop(name, None)
+    out = subprocess.check_output([sys.executable, "-c", CHILD],
+                                  cwd=workdir, env=env)
+    cold, save = out.split()
+    return float(cold), float(save)
+
+
+def split(path):
+    """writes the objects of the JSON file at path to one file per class"""
+    with open(path) as f:
+        objs = json.load(f)
+    shards = {}
+    for key, record in objs.items():
+        shards.setdefault(record["__class__"], {})[key] = record
+    root, ext = os.path.splitext(path)
+    for name, shard in shards.items():
+        with open("{}.{}{}".format(root, name, ext), "w") as f:
+            json.dump(shard, f)
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    for sharded in (False, True):
+        workdir = tempfile.mkdtemp()
+        path = os.path.join(workdir, "file.json")
+        generate(path, count)
+        if sharded:
+            split(path)
+        cold, save = measure(workdir, sharded)
+        print("{:7}: all(State) in a new process {:6.2f}s, save() of one "
+              "state {:6.2f}s".format("sharded" if sharded else "single",
+                                      cold, save))
+        shutil.rmtree(workdir)
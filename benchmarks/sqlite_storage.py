@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""
+Compares SQLiteStorage with FileStorage, and MemoryStorage as the
+baseline, on the same generated data: the startup of a process (import
+models), get() by id, count(), the places of a city with by_fk(), an
+update saved with save() and all(Place)
+
+usage: python3 -m benchmarks.sqlite_storage [number of places]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+SEED = """
+import models
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+state = State(name="California")
+cities = [City(name=str(i), state_id=state.id) for i in range(100)]
+users = [User(email="{{}}@hbnb.io".format(i), password="pwd")
+         for i in range(100)]
+models.storage.bulk_new([state] + cities + users)
+models.storage.bulk_new([Place(name="place {{}}".format(i),
+                               city_id=cities[i % 100].id,
+                               user_id=users[i % 100].id, number_rooms=i % 5)
+                         for i in range({count})])
+if models.storage_t == "memory":
+    models.storage.dump()
+print(cities[0].id)
+"""
+
+CHILD = """
+import time
+start = time.perf_counter()
+import models
+from models.place import Place
+timings = [time.perf_counter() - start]
+ids = [key.split(".")[1] for key in list(models.storage.all(Place))[:1000]]
+models.storage.close()
+
+
+def measure(function, repeat):
+    \"\"\"appends the mean seconds of function\"\"\"
+    start = time.perf_counter()
+    for i in range(repeat):
+        function(i)
+    timings.append((time.perf_counter() - start) / repeat)
+measure(lambda i: models.storage.get(Place, ids[i]), 1000)
+measure(lambda i: models.storage.count(Place), 20)
+measure(lambda i: models.storage.by_fk(Place, "city_id", {city_id!r}), 20)
+place = models.storage.get(Place, ids[0])
+
+
+def update(i):
+    \"\"\"changes one place and saves it\"\"\"
+    place.number_rooms = i
+    models.storage.save()
+measure(update, 20)
+models.storage.close()
+measure(lambda i: models.storage.all(Place), 3)
+print(" ".join(str(timing) for timing in timings))
+"""
+
+
+def run(workdir, count, env):
+    """returns the timings of each operation, in seconds"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), **env)
+    for name in ("HBNB_FILE_LAZY", "HBNB_FILE_SHARDS", "HBNB_FILE_MMAP",
+                 "HBNB_FILE_FORMAT", "HBNB_FILE_JOURNAL",
+                 "HBNB_DB_CACHE_SIZE"):
+        env.pop(name, None)
+    city_id = subprocess.check_output(
+        [sys.executable, "-c", SEED.format(count=count)], cwd=workdir,
+        env=env, universal_newlines=True).strip()
+    out = subprocess.check_output(
+        [sys.executable, "-c", CHILD.format(city_id=city_id)], cwd=workdir,
+        env=env, universal_newlines=True)
+    return [float(value) for value in out.split()]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("{} places in 100 cities".format(count))
+    for name, env in (("FileStorage", {"HBNB_TYPE_STORAGE": "file"}),
+                      ("SQLiteStorage", {"HBNB_TYPE_STORAGE": "sqlite",
+                                         "HBNB_SQLITE_PATH": "hbnb.db"}),
+                      ("MemoryStorage", {"HBNB_TYPE_STORAGE": "memory",
+                                         "HBNB_MEMORY_FILE": "file.json"})):
+        workdir = tempfile.mkdtemp()
+        timings = run(workdir, count, env)
+        print("{:13}: import models {:7.3f} s, get {:7.1f} us, count "
+              "{:7.2f} ms, by_fk {:7.2f} ms, update + save {:8.2f} "
+              "ms, all(Place) {:7.3f} s".format(
+                  name, timings[0], timings[1] * 1e6, timings[2] * 1e3,
+                  timings[3] * 1e3, timings[4] * 1e3, timings[5]))
+        shutil.rmtree(workdir)
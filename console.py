@@ -96,7 +96,7 @@ class HBNBCommand(cmd.Cmd):
             if len(args) > 1:
                 key = args[0] + "." + args[1]
                 if key in models.storage.all():
-                    models.storage.all().pop(key)
+                    models.storage.delete(models.storage.all()[key])
                     models.storage.save()
                 else:
                     print("** no instance found **")
@@ -108,18 +108,16 @@ class HBNBCommand(cmd.Cmd):
     def do_all(self, arg):
         """Prints string representations of instances"""
         args = shlex.split(arg)
-        obj_list = []
-        if len(args) == 0:
-            obj_dict = models.storage.all()
-        elif args[0] in classes:
-            obj_dict = models.storage.all(classes[args[0]])
-        else:
+        if len(args) != 0 and args[0] not in classes:
             print("** class doesn't exist **")
             return False
-        for key in obj_dict:
-            obj_list.append(str(obj_dict[key]))
+        cls = classes[args[0]] if len(args) != 0 else None
+        separator = ""
         print("[", end="")
-        print(", ".join(obj_list), end="")
+        with models.storage.snapshot() as snapshot:
+            for obj in snapshot.iter_all(cls):
+                print(separator + str(obj), end="")
+                separator = ", "
         print("]")
 
     def do_update(self, arg):
@@ -1,17 +1,81 @@
 #!/usr/bin/python3
 """
 initialize the models package
+
+models.storage is created on its first access: the engine is imported,
+instantiated and reloaded then, so that importing models does not pay for
+an engine, or SQLAlchemy, that is not used. The SQL engines are imported
+with models, as the mapped models need each other
 """
 
+from importlib import import_module
 from os import getenv
+import threading
 
+# dictionary - the storage engines by HBNB_TYPE_STORAGE value: the
+# "module:Class" of the engine and the storage_t the models are built for,
+# "db" for the engines of the SQLAlchemy models
+engines = {
+    "file": ("models.engine.file_storage:FileStorage", "file"),
+    "mmap": ("models.engine.mmap_storage:MmapStorage", "file"),
+    "memory": ("models.engine.memory_storage:MemoryStorage", "memory"),
+    "db": ("models.engine.db_storage:DBStorage", "db"),
+    "sqlite": ("models.engine.sqlite_storage:SQLiteStorage", "db"),
+}
+# strings - entry point groups of the engines of other packages, for the
+# plain models and for the SQLAlchemy models
+entry_point_groups = (("hbnb.storage", "file"), ("hbnb.db_storage", "db"))
+
+
+def find_engine(name):
+    """returns the "module:Class" and the storage_t of the engine name: a
+    key of engines, a "module:Class" path or the name of an entry point,
+    FileStorage otherwise"""
+    if name in engines:
+        return engines[name]
+    if name and ":" in name:
+        return name, "file"
+    if name:
+        from importlib.metadata import entry_points
+        for group, kind in entry_point_groups:
+            for entry_point in entry_points(group=group, name=name):
+                return entry_point.value, kind
+    return engines["file"]
 
-storage_t = getenv("HBNB_TYPE_STORAGE")
 
-if storage_t == "db":
-    from models.engine.db_storage import DBStorage
-    storage = DBStorage()
+storage_t = getenv("HBNB_TYPE_STORAGE")
+if storage_t in (None, "file") and getenv("HBNB_FILE_MMAP") == "1":
+    _engine, _kind = engines["mmap"]
 else:
-    from models.engine.file_storage import FileStorage
-    storage = FileStorage()
-storage.reload()
+    _engine, _kind = find_engine(storage_t)
+if _kind == "db":
+    # the models are mapped to tables as for MySQL, the engine module
+    # imports all of them so that their relationships can be resolved
+    storage_t = "db"
+    import_module(_engine.partition(":")[0])
+# RLock - guards the creation of the storage
+_lock = threading.RLock()
+# the engine being reloaded by the first access to models.storage
+_loading = None
+
+
+def __getattr__(name):
+    """creates and reloads the storage on the first access to
+    models.storage"""
+    global storage, _loading
+    if name != "storage":
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name))
+    with _lock:
+        if _loading is not None:
+            # the models created by reload() use the engine being loaded
+            return _loading
+        if "storage" not in globals():
+            module, cls = _engine.split(":")
+            _loading = getattr(import_module(module), cls)()
+            try:
+                _loading.reload()
+                storage = _loading
+            finally:
+                _loading = None
+    return storage
@@ -6,14 +6,25 @@ Contains class BaseModel
 from datetime import datetime
 import models
 from os import getenv
-import sqlalchemy
-from sqlalchemy import Column, String, DateTime
-from sqlalchemy.ext.declarative import declarative_base
 import uuid
 
 time = "%Y-%m-%dT%H:%M:%S.%f"
+# object - the old value passed to storage.changed() for an attribute that
+# the instance did not have
+absent = object()
+
+
+def given_attributes(obj, values):
+    """returns the attributes of obj, built from the dictionary values,
+    without the id and dates __init__ made up because values lacks them"""
+    return {name: value for name, value in obj.__dict__.items()
+            if name in values or name not in ("id", "created_at",
+                                              "updated_at",
+                                              "_sa_instance_state")}
 
 if models.storage_t == "db":
+    from sqlalchemy import Column, String, DateTime
+    from sqlalchemy.ext.declarative import declarative_base
     Base = declarative_base()
 else:
     Base = object
@@ -29,16 +40,17 @@ class BaseModel:
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
         if kwargs:
+            # the object is not stored yet: no change to track
             for key, value in kwargs.items():
                 if key != "__class__":
-                    setattr(self, key, value)
+                    super().__setattr__(key, value)
             if kwargs.get("created_at", None) and type(self.created_at) is str:
                 self.created_at = datetime.strptime(kwargs["created_at"], time)
-            else:
+            elif type(kwargs.get("created_at", None)) is not datetime:
                 self.created_at = datetime.utcnow()
             if kwargs.get("updated_at", None) and type(self.updated_at) is str:
                 self.updated_at = datetime.strptime(kwargs["updated_at"], time)
-            else:
+            elif type(kwargs.get("updated_at", None)) is not datetime:
                 self.updated_at = datetime.utcnow()
             if kwargs.get("id", None) is None:
                 self.id = str(uuid.uuid4())
@@ -47,6 +59,15 @@ class BaseModel:
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
+    def __setattr__(self, name, value):
+        """sets an attribute and lets the file storage track the change"""
+        if models.storage_t == "db":
+            super().__setattr__(name, value)
+        else:
+            old = self.__dict__.get(name, absent)
+            super().__setattr__(name, value)
+            models.storage.changed(self, name, old)
+
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
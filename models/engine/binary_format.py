@@ -0,0 +1,295 @@
+#!/usr/bin/python3
+"""
+Contains the Schema class and the functions reading and writing the
+binary snapshots of the file storage
+
+A snapshot starts with MAGIC and the length-prefixed JSON list of the
+columns of each class, then holds one length-prefixed record per object:
+the index of its class, a bitmap of the columns it sets, a bitmap of
+those stored in their compact form, the fixed-size values of the columns
+it sets (strings as their byte length, or as 16 bytes if they are UUIDs,
+integers on 4 bytes if they fit or 8, floats, datetimes as microseconds
+since the epoch), the UTF-8 strings, then the attributes that fit no
+column as a JSON object.
+
+usage: python3 -m models.engine.binary_format file.json file.hbnb
+       python3 -m models.engine.binary_format file.hbnb file.json
+"""
+
+from datetime import datetime, timedelta
+import json
+import struct
+import sys
+
+MAGIC = b"HBNB\x01"
+LENGTH = struct.Struct("<I")
+HEAD = struct.Struct("<BQQ")
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+time = "%Y-%m-%dT%H:%M:%S.%f"
+# struct format of each kind of column, and of its compact form: string
+# (UUID), integer (that fits on 4 bytes), float, datetime
+formats = {"s": ("I", "16s"), "i": ("q", "i"), "f": ("d", "d"),
+           "t": ("q", "q")}
+kinds = {str: "s", int: "i", float: "f"}
+
+
+def pack_uuid(value):
+    """returns the 16 bytes of value if it is a lowercase UUID string"""
+    if len(value) != 36:
+        return None
+    digits = value.replace("-", "")
+    try:
+        packed = bytes.fromhex(digits)
+    except ValueError:
+        return None
+    if (len(packed) != 16 or packed.hex() != digits or
+            unpack_uuid(packed) != value):
+        return None
+    return packed
+
+
+def unpack_uuid(packed):
+    """returns the UUID string of 16 bytes"""
+    digits = packed.hex()
+    return (digits[:8] + "-" + digits[8:12] + "-" + digits[12:16] + "-" +
+            digits[16:20] + "-" + digits[20:])
+
+
+class Schema:
+    """columns of each class, and how records are packed into them"""
+
+    def __init__(self, classes):
+        """Instantiate a Schema from a list of [class name, [[column,
+        kind], ...]] pairs"""
+        self.classes = [[name, [list(column) for column in columns][:64]]
+                        for name, columns in classes]
+        self.__by_name = {}
+        for index, (name, columns) in enumerate(self.classes):
+            names = frozenset(column for column, kind in columns)
+            self.__by_name[name] = (index, columns, names)
+        # (class index, bitmap, compact bitmap) -> (class name, struct,
+        # [(column, kind), ...]) where kind is "u" for packed UUIDs, "r"
+        # for the packed UUIDs of other objects
+        self.__layouts = {}
+        # dictionary - UUID strings by their bytes, shared by the records
+        # decoded that reference the same object
+        self.__uuids = {}
+
+    @classmethod
+    def of(cls, classes):
+        """returns the Schema of a dictionary of model classes: id and the
+        dates, then the string, int and float class attributes"""
+        described = []
+        for name, model in classes.items():
+            columns = [["id", "s"], ["created_at", "t"], ["updated_at", "t"]]
+            for klass in reversed(model.__mro__):
+                for column, value in vars(klass).items():
+                    if (not column.startswith("__") and
+                            type(value) in kinds and
+                            [column, kinds[type(value)]] not in columns):
+                        columns.append([column, kinds[type(value)]])
+            described.append([name, columns])
+        return cls(described)
+
+    def __eq__(self, other):
+        """tells if both schemas have the same columns"""
+        return isinstance(other, Schema) and self.classes == other.classes
+
+    def header(self):
+        """returns the bytes a snapshot using this schema starts with"""
+        columns = json.dumps(self.classes).encode()
+        return MAGIC + LENGTH.pack(len(columns)) + columns
+
+    def __layout(self, index, present, compact):
+        """returns how the records with the given bitmaps are packed"""
+        key = (index, present, compact)
+        layout = self.__layouts.get(key)
+        if layout is None:
+            name, columns = self.classes[index]
+            fmt = "<"
+            steps = []
+            for i, (column, kind) in enumerate(columns):
+                if present >> i & 1:
+                    fmt += formats[kind][compact >> i & 1]
+                    if kind == "s" and compact >> i & 1:
+                        kind = "u" if column == "id" else "r"
+                    steps.append((column, kind))
+            layout = (name, struct.Struct(fmt + "I"), steps)
+            self.__layouts[key] = layout
+        return layout
+
+    def encode(self, name, attrs):
+        """returns the length-prefixed record of the attributes attrs of an
+        object of class name; dates may be datetimes or strings"""
+        index, columns, names = self.__by_name[name]
+        present = compact = 0
+        values = []
+        strings = []
+        extras = {}
+        for i, (column, kind) in enumerate(columns):
+            if column not in attrs:
+                continue
+            value = attrs[column]
+            if kind == "s" and type(value) is str:
+                packed = pack_uuid(value)
+                if packed is None:
+                    packed = value.encode("utf-8", "surrogatepass")
+                    strings.append(packed)
+                    packed = len(packed)
+                else:
+                    compact |= 1 << i
+                values.append(packed)
+            elif kind == "i" and type(value) is int and \
+                    -1 << 63 <= value < 1 << 63:
+                if -1 << 31 <= value < 1 << 31:
+                    compact |= 1 << i
+                values.append(value)
+            elif kind == "f" and type(value) is float:
+                values.append(value)
+            elif kind == "t" and type(value) in (str, datetime):
+                if type(value) is str:
+                    try:
+                        value = datetime.strptime(value, time)
+                    except ValueError:
+                        extras[column] = value
+                        continue
+                if value.tzinfo is not None:
+                    extras[column] = value
+                    continue
+                values.append((value - EPOCH) // MICROSECOND)
+            else:
+                extras[column] = value
+                continue
+            present |= 1 << i
+        for column, value in attrs.items():
+            if column not in names and column != "__class__":
+                extras[column] = value
+        extras = json.dumps(extras).encode() if extras else b""
+        values.append(len(extras))
+        layout = self.__layout(index, present, compact)[1]
+        body = (HEAD.pack(index, present, compact) + layout.pack(*values) +
+                b"".join(strings) + extras)
+        return LENGTH.pack(len(body)) + body
+
+    def key(self, data, pos, size):
+        """returns the key of the record body of size bytes held in the
+        buffer data at offset pos, decoding only its id when possible"""
+        name, layout, steps = self.__layout(*HEAD.unpack_from(data, pos))
+        if steps and steps[0][0] == "id":
+            value = layout.unpack_from(data, pos + HEAD.size)[0]
+            if steps[0][1] == "u":
+                return name + "." + unpack_uuid(value)
+            start = pos + HEAD.size + layout.size
+            return name + "." + bytes(data[start:start + value]).decode(
+                "utf-8", "surrogatepass")
+        return self.decode(bytes(data[pos:pos + size]))[0]
+
+    def decode(self, body):
+        """returns the key and the record (with datetime dates) of the
+        record body, without its length prefix"""
+        name, layout, steps = self.__layout(*HEAD.unpack_from(body))
+        values = layout.unpack_from(body, HEAD.size)
+        pos = HEAD.size + layout.size
+        record = {}
+        for (column, kind), value in zip(steps, values):
+            if kind == "s":
+                record[column] = body[pos:pos + value].decode(
+                    "utf-8", "surrogatepass")
+                pos += value
+            elif kind == "r":
+                uuid = self.__uuids.get(value)
+                if uuid is None:
+                    uuid = self.__uuids[value] = unpack_uuid(value)
+                record[column] = uuid
+            elif kind == "u":
+                record[column] = unpack_uuid(value)
+            elif kind == "t":
+                record[column] = EPOCH + value * MICROSECOND
+            else:
+                record[column] = value
+        if values[-1]:
+            record.update(json.loads(body[pos:pos + values[-1]]))
+        record["__class__"] = name
+        return name + "." + record["id"], record
+
+
+def read_header(data):
+    """returns the Schema of the snapshot held in the buffer data and the
+    offset of its first record"""
+    if data[:len(MAGIC)] != MAGIC or len(data) < len(MAGIC) + LENGTH.size:
+        raise ValueError("not a binary snapshot")
+    pos = len(MAGIC) + LENGTH.size
+    end = pos + LENGTH.unpack_from(data, len(MAGIC))[0]
+    if end > len(data):
+        raise ValueError("truncated snapshot")
+    return Schema(json.loads(data[pos:end])), end
+
+
+def iter_offsets(data, pos):
+    """yields the (offset, size) of the body of each record held in the
+    buffer data from offset pos"""
+    while pos < len(data):
+        if pos + LENGTH.size > len(data):
+            raise ValueError("truncated snapshot")
+        size = LENGTH.unpack_from(data, pos)[0]
+        pos += LENGTH.size
+        if pos + size > len(data):
+            raise ValueError("truncated snapshot")
+        yield pos, size
+        pos += size
+
+
+def iter_records(f, schema=None):
+    """yields the (key, record, length-prefixed record) of each object of
+    the snapshot in the binary file f; the encoded record is None unless
+    the snapshot uses the given schema, so it can be written back as is"""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a binary snapshot")
+    head = f.read(LENGTH.size)
+    if len(head) < LENGTH.size:
+        raise ValueError("truncated snapshot")
+    columns = f.read(LENGTH.unpack(head)[0])
+    read = Schema(json.loads(columns))
+    keep = read == schema
+    while True:
+        head = f.read(LENGTH.size)
+        if not head:
+            return
+        if len(head) < LENGTH.size:
+            raise ValueError("truncated snapshot")
+        size = LENGTH.unpack(head)[0]
+        body = f.read(size)
+        if len(body) < size:
+            raise ValueError("truncated snapshot")
+        key, record = read.decode(body)
+        yield key, record, head + body if keep else None
+
+
+def convert(src, dst, schema):
+    """converts the JSON file src into the binary snapshot dst, or the
+    binary snapshot src into the JSON file dst if dst ends with .json"""
+    if dst.endswith(".json"):
+        with open(src, "rb") as f:
+            objs = {}
+            for key, record, encoded in iter_records(f):
+                for column in ("created_at", "updated_at"):
+                    if type(record.get(column)) is datetime:
+                        record[column] = record[column].strftime(time)
+                objs[key] = record
+        with open(dst, "w") as f:
+            json.dump(objs, f)
+    else:
+        with open(src, "r") as f:
+            objs = json.load(f)
+        with open(dst, "wb") as f:
+            f.write(schema.header())
+            for record in objs.values():
+                f.write(schema.encode(record["__class__"], record))
+
+
+if __name__ == "__main__":
+    from models.engine.file_storage import classes
+    if len(sys.argv) != 3:
+        sys.exit("usage: {} src dst".format(sys.argv[0]))
+    convert(sys.argv[1], sys.argv[2], Schema.of(classes))
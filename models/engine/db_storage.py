@@ -3,71 +3,314 @@
 Contains the class DBStorage
 """
 
+from collections import OrderedDict
+from contextlib import contextmanager
 import models
 from models.amenity import Amenity
-from models.base_model import BaseModel, Base
+from models.base_model import BaseModel, Base, given_attributes
 from models.city import City
+from models.engine.paging import next_page, start
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import (and_, create_engine, event, func, inspect, literal,
+                        or_, select, text, union_all)
+from sqlalchemy.orm import (Session, joinedload, scoped_session,
+                            selectinload, sessionmaker)
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql.expression import Delete, Insert, Update
+import itertools
+import threading
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
 
+class RoutingSession(Session):
+    """session running the writes on its primary engine and the reads on
+    the replica returned by choose(), picked on its first read
+
+    After the first write the session reads the primary too, so that the
+    rest of the request sees what it wrote whatever the replication lag."""
+
+    def __init__(self, choose=None, **kwargs):
+        """keeps the function choosing the replica of the session"""
+        super().__init__(**kwargs)
+        self.choose = choose
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """returns the engine the statement must run on"""
+        if (self._flushing or self.info.get("wrote") or
+                isinstance(clause, (Insert, Update, Delete))):
+            self.info["wrote"] = True
+            return self.bind
+        if "replica" not in self.info:
+            self.info["replica"] = self.choose()
+        return self.info["replica"]
+
+
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
     __session = None
+    # settings of the connection pool: environment variable suffix,
+    # create_engine() argument and type
+    __pool_settings = (("SIZE", "pool_size", int),
+                       ("OVERFLOW", "max_overflow", int),
+                       ("TIMEOUT", "pool_timeout", float),
+                       ("RECYCLE", "pool_recycle", int))
+    # pragmas run on each new SQLite connection: write-ahead log so that
+    # readers do not block the writer, fsync at checkpoints only, foreign
+    # keys enforced as on MySQL, 64 MiB of page cache, 256 MiB mapped
+    __sqlite_pragmas = ("journal_mode=WAL", "synchronous=NORMAL",
+                        "foreign_keys=ON", "temp_store=MEMORY",
+                        "cache_size=-65536", "mmap_size=268435456",
+                        "busy_timeout=5000")
 
-    def __init__(self):
-        """Instantiate a DBStorage object"""
+    def __init__(self, url=None):
+        """Instantiate a DBStorage object on url, or on the database of
+        the environment"""
         HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
         HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
+        # any SQLAlchemy URL, e.g. sqlite:///hbnb.db, instead of MySQL
+        HBNB_DB_URL = getenv('HBNB_DB_URL')
+        # comma separated URLs of the read replicas of the database
+        HBNB_DB_REPLICAS = getenv('HBNB_DB_REPLICAS')
+        pool = {}
+        for name, arg, kind in self.__pool_settings:
+            value = getenv('HBNB_MYSQL_POOL_' + name)
+            if value:
+                pool[arg] = kind(value)
+        if getenv('HBNB_MYSQL_POOL_PRE_PING') == "1":
+            pool["pool_pre_ping"] = True
+        self.__engine = create_engine(url or HBNB_DB_URL or
+                                      'mysql+mysqldb://{}:{}@{}/{}'.
                                       format(HBNB_MYSQL_USER,
                                              HBNB_MYSQL_PWD,
                                              HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+                                             HBNB_MYSQL_DB), **pool)
+        self.__replicas = [create_engine(url.strip(), **pool)
+                           for url in (HBNB_DB_REPLICAS or "").split(",")
+                           if url.strip()]
+        # "round_robin" or "least_connections"
+        self.__policy = getenv('HBNB_DB_REPLICA_POLICY', "round_robin")
+        self.__turns = itertools.count()
+        self.__warmup = int(getenv('HBNB_MYSQL_POOL_WARMUP', 0))
+        self.__stats = {"connects": 0, "checkouts": 0, "checkins": 0,
+                        "peak_checked_out": 0, "cache_hits": 0,
+                        "cache_misses": 0}
+        self.__stats_lock = threading.Lock()
+        # the column values of the objects get() returned last, by
+        # (class name, id), shared by the threads
+        self.__cache_size = int(getenv('HBNB_DB_CACHE_SIZE', 0))
+        self.__cache = OrderedDict()
+        self.__cache_lock = threading.Lock()
+        # incremented each time objects are removed from the cache: a get()
+        # only caches what it read if nothing was removed meanwhile
+        self.__cache_generation = 0
+        for engine in [self.__engine] + self.__replicas:
+            for name in ("connect", "checkout", "checkin"):
+                event.listen(engine, name, self.__counter(name + "s"))
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", self.__tune_sqlite)
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    def __tune_sqlite(self, connection, record):
+        """runs the pragmas on a new SQLite connection"""
+        cursor = connection.cursor()
+        for pragma in self.__sqlite_pragmas:
+            cursor.execute("PRAGMA " + pragma)
+        cursor.close()
+
+    def __index_foreign_keys(self, engine):
+        """creates the indexes of the foreign key columns, which SQLite
+        does not create by itself unlike MySQL"""
+        with engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                for column in table.columns:
+                    if column.foreign_keys:
+                        connection.execute(text(
+                            "CREATE INDEX IF NOT EXISTS ix_{0}_{1} "
+                            "ON {0} ({1})".format(table.name, column.name)))
+
+    def __counter(self, name):
+        """returns a pool event listener counting the events in name"""
+        def count(*args):
+            """counts one more pool event"""
+            with self.__stats_lock:
+                self.__stats[name] += 1
+                self.__stats["peak_checked_out"] = max(
+                    self.__stats["peak_checked_out"],
+                    self.__stats["checkouts"] - self.__stats["checkins"])
+        return count
+
+    def __choose(self):
+        """returns the replica a new session reads from: the next one in
+        turn, or the one with the fewest connections checked out"""
+        if self.__policy == "least_connections":
+            return min(self.__replicas,
+                       key=lambda engine: engine.pool.checkedout())
+        return self.__replicas[next(self.__turns) % len(self.__replicas)]
+
+    def stats(self):
+        """returns counters about the connection pool: the connections
+        opened, checked out and checked in, and the most checked out at
+        once, and the hits and misses of the get() cache"""
+        with self.__stats_lock:
+            stats = dict(self.__stats)
+        stats["checked_out"] = stats["checkouts"] - stats["checkins"]
+        return stats
+
+    def __query(self, cls, load=(), strategy="selectin"):
+        """returns a query of cls preloading the relationship paths in load,
+        such as "cities" or "cities.places", with a SELECT ... IN per
+        relationship ("selectin") or a JOIN ("joined")"""
+        loader = {"selectin": selectinload, "joined": joinedload}[strategy]
+        options = []
+        for path in load:
+            option = None
+            owner = cls
+            for name in path.split("."):
+                attr = getattr(owner, name)
+                if option is None:
+                    option = loader(attr)
+                else:
+                    option = getattr(option, loader.__name__)(attr)
+                owner = attr.property.mapper.class_
+            options.append(option)
+        return self.__session.query(cls).options(*options)
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """query on the current database session, preloading the
+        relationship paths in load if cls is given"""
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                objs = self.__query(classes[clss], load if cls else (),
+                                    strategy).all()
                 for obj in objs:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
         return (new_dict)
 
+    def iter_all(self, cls=None, batch_size=1000, load=(),
+                 strategy="selectin"):
+        """yields the objects, of class cls if given, fetching batch_size
+        rows at a time through a server-side cursor"""
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls is clss:
+                query = self.__query(classes[clss], load if cls else (),
+                                     strategy)
+                for obj in query.yield_per(batch_size):
+                    yield obj
+
     def new(self, obj):
         """add the object to the current database session"""
+        self.__session.info["wrote"] = True
+        self.__forget([obj])
         self.__session.add(obj)
 
     def save(self):
         """commit all changes of the current database session"""
+        self.__session.info["wrote"] = True
+        changed = (list(self.__session.new) + list(self.__session.dirty) +
+                   list(self.__session.deleted))
+        self.__forget(changed)
         self.__session.commit()
+        # a get() may have cached the old values during the commit
+        self.__forget(changed)
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
+            self.__session.info["wrote"] = True
+            self.__forget([obj])
             self.__session.delete(obj)
 
+    def bulk_new(self, objs):
+        """adds objs to the current database session and commits them with
+        the other changes of the session, in a single commit"""
+        self.__session.info["wrote"] = True
+        self.__session.add_all(objs)
+        self.save()
+
+    def bulk_upsert(self, dicts):
+        """creates or updates the rows described by dicts, as returned by
+        to_dict(), with one executemany per class for the inserts and one
+        for the updates, then commits them in a single commit"""
+        rows = {}
+        changes = {}
+        for values in dicts:
+            obj = classes[values["__class__"]](**values)
+            given = given_attributes(obj, values)
+            columns = [attr.key for attr in inspect(type(obj)).column_attrs]
+            rows.setdefault(type(obj), {})[obj.id] = {
+                key: obj.__dict__[key] for key in columns
+                if key in obj.__dict__}
+            # the rows that exist only get the values given
+            changes.setdefault(type(obj), {})[obj.id] = {
+                key: given[key] for key in columns if key in given}
+        self.__session.info["wrote"] = True
+        updated = []
+        for cls, by_id in rows.items():
+            ids = list(by_id)
+            existing = set()
+            for i in range(0, len(ids), 500):
+                existing.update(self.__session.scalars(
+                    select(cls.id).where(cls.id.in_(ids[i:i + 500]))))
+            self.__session.bulk_update_mappings(
+                cls, [changes[cls][id] for id in existing])
+            self.__session.bulk_insert_mappings(
+                cls, [row for id, row in by_id.items() if id not in existing])
+            updated.extend((cls, id) for id in existing)
+        self.save()
+        self.__forget_keys((cls.__name__, id) for cls, id in updated)
+        for cls, id in updated:
+            obj = self.__session.identity_map.get(identity_key(cls, id))
+            if obj is not None:
+                self.__session.expire(obj)
+
+    def __forget(self, objs):
+        """removes objs from the get() cache"""
+        self.__forget_keys((obj.__class__.__name__, obj.id) for obj in objs)
+
+    def __forget_keys(self, keys):
+        """removes the (class name, id) keys from the get() cache"""
+        if self.__cache_size:
+            with self.__cache_lock:
+                self.__cache_generation += 1
+                for key in keys:
+                    self.__cache.pop(key, None)
+
     def reload(self):
         """reloads data from the database"""
-        Base.metadata.create_all(self.__engine)
-        sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        for engine in [self.__engine] + self.__replicas:
+            # nothing to create on replicas that replicate the schema
+            Base.metadata.create_all(engine)
+            if engine.dialect.name == "sqlite":
+                self.__index_foreign_keys(engine)
+            # open the connections now rather than during the first
+            # requests
+            connections = [engine.connect() for i in range(self.__warmup)]
+            for connection in connections:
+                connection.close()
+        if self.__replicas:
+            sess_factory = sessionmaker(bind=self.__engine,
+                                        class_=RoutingSession,
+                                        choose=self.__choose,
+                                        expire_on_commit=False)
+        else:
+            sess_factory = sessionmaker(bind=self.__engine,
+                                        expire_on_commit=False)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
@@ -75,10 +318,103 @@ class DBStorage:
         """call remove() method on the private session attribute"""
         self.__session.remove()
 
-    def get(self, cls, id):
-        """retrieves one object"""
-        return self.__session.query(cls).filter_by(id=id).first()
+    def get(self, cls, id, load=(), strategy="selectin"):
+        """retrieves one object, preloading the relationship paths in
+        load"""
+        if not self.__cache_size or load:
+            return self.__query(cls, load, strategy).filter_by(
+                id=id).first()
+        obj = self.__session.identity_map.get(identity_key(cls, id))
+        if obj is not None:
+            return obj
+        key = (cls.__name__, id)
+        with self.__cache_lock:
+            values = self.__cache.get(key)
+            if values is not None:
+                self.__cache.move_to_end(key)
+            generation = self.__cache_generation
+        with self.__stats_lock:
+            self.__stats["cache_misses" if values is None
+                         else "cache_hits"] += 1
+        if values is not None:
+            return self.__attach(cls, values)
+        obj = self.__session.query(cls).filter_by(id=id).first()
+        if obj is not None:
+            values = {attr.key: obj.__dict__[attr.key]
+                      for attr in inspect(cls).column_attrs
+                      if attr.key in obj.__dict__}
+            with self.__cache_lock:
+                # a save() may have committed new values since the query
+                if generation == self.__cache_generation:
+                    self.__cache[key] = values
+                    self.__cache.move_to_end(key)
+                    while len(self.__cache) > self.__cache_size:
+                        self.__cache.popitem(last=False)
+        return obj
+
+    def __attach(self, cls, values):
+        """returns an object of the session built from the cached values,
+        without a query"""
+        obj = inspect(cls).class_manager.new_instance()
+        for name, value in values.items():
+            set_committed_value(obj, name, value)
+        make_transient_to_detached(obj)
+        return self.__session.merge(obj, load=False)
+
+    def by_fk(self, cls, attr, value):
+        """returns the objects of cls whose column attr equals value"""
+        return self.__session.query(cls).filter(
+            getattr(cls, attr) == value).all()
+
+    def page(self, cls, after=None, limit=100, order_by="id", filters=None,
+             load=(), strategy="selectin"):
+        """returns a list of at most limit objects of cls whose columns
+        equal filters, ordered by order_by then id, that come after the
+        cursor after, and the cursor of the next page (None on the last
+        page), see models.engine.paging
+
+        The page is read with WHERE id > ? ORDER BY id LIMIT ? (or the
+        same on (order_by, id)), one row more than the page to tell if
+        there is a next one"""
+        if isinstance(cls, str):
+            cls = classes[cls]
+        position = start(after, limit, order_by)
+        query = self.__query(cls, load, strategy).filter_by(
+            **(filters or {}))
+        column = getattr(cls, order_by)
+        if order_by == "id":
+            order = [cls.id]
+            if position is not None:
+                query = query.filter(cls.id > position[1])
+        else:
+            order = [column, cls.id]
+            if position is not None:
+                value, id = position
+                query = query.filter(or_(column > value,
+                                         and_(column == value, cls.id > id)))
+        return next_page(query.order_by(*order).limit(limit + 1).all(),
+                         limit, order_by)
+
+    @contextmanager
+    def snapshot(self):
+        """yields the storage itself: the queries of the session run in its
+        transaction, which MySQL's repeatable read isolation keeps
+        consistent until the next commit"""
+        yield self
 
     def count(self, cls=None):
         """count the number of objects in storage"""
-        return len(self.all(cls))
+        if cls is None:
+            return sum(self.counts().values())
+        if isinstance(cls, str):
+            cls = classes[cls]
+        return self.__session.query(func.count(cls.id)).scalar()
+
+    def counts(self):
+        """returns the number of objects of each class by class name, in a
+        single query"""
+        query = union_all(*[select(literal(name), func.count(cls.id))
+                            for name, cls in classes.items()])
+        counts = {name: 0 for name in classes}
+        counts.update(self.__session.execute(query).all())
+        return counts
@@ -3,77 +3,1119 @@
 Contains the FileStorage class
 """
 
+import bisect
+from contextlib import contextmanager
+import fcntl
 import json
 from models.amenity import Amenity
-from models.base_model import BaseModel
+from models.base_model import BaseModel, absent, given_attributes
 from models.city import City
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from models.engine.binary_format import Schema, iter_records
+from models.engine.json_stream import iter_items
+from models.engine.paging import matches, next_page, page_of, start
+from models.engine.rwlock import RWLock
+from os import getenv
+import os
+import threading
+import time
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+fk_attrs = ("state_id", "place_id", "user_id", "city_id")
+schema = Schema.of(classes)
+
+
+class Snapshot:
+    """immutable view of the objects of a FileStorage at a given version"""
+
+    def __init__(self, version, partitions, fill=None):
+        """Instantiate a Snapshot of the objects, by class name then key;
+        fill(view, name, keys) makes the view hold the objects of keys of
+        the class name (all of them if None) when they are used"""
+        self.version = version
+        self.partitions = partitions
+        self.__fill = fill
+
+    def __objects(self, name, keys=None):
+        """returns the objects of the class name by key, after filling the
+        view with those of keys"""
+        if self.__fill is not None:
+            self.__fill(self, name, keys)
+        return self.partitions.get(name, {})
+
+    def __names(self):
+        """returns the names of the classes the view may hold"""
+        return list(classes if self.__fill is not None else self.partitions)
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """returns a dictionary of the objects, of class cls if given"""
+        if cls is not None:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            return dict(self.__objects(cls))
+        objs = {}
+        for name in self.__names():
+            objs.update(self.__objects(name))
+        return objs
+
+    def iter_all(self, cls=None, batch_size=1000, load=(),
+                 strategy="selectin"):
+        """yields the objects of the snapshot, of class cls if given"""
+        if cls is not None:
+            names = [cls if isinstance(cls, str) else cls.__name__]
+        else:
+            names = self.__names()
+        for name in names:
+            for obj in list(self.__objects(name).values()):
+                yield obj
+
+    def get(self, cls, id, load=(), strategy="selectin"):
+        """retrieves one object"""
+        key = cls.__name__ + '.' + id
+        return self.__objects(cls.__name__, [key]).get(key)
+
+    def page(self, cls, after=None, limit=100, order_by="id", filters=None,
+             load=(), strategy="selectin"):
+        """returns a page of the objects of class cls of the snapshot and
+        the cursor of the next one, see models.engine.paging"""
+        return page_of(self.all(cls).values(), after, limit, order_by,
+                       filters)
+
+    def count(self, cls=None):
+        """count the number of objects in the snapshot"""
+        if cls is not None:
+            names = [cls if isinstance(cls, str) else cls.__name__]
+        else:
+            names = self.__names()
+        return sum(len(self.__objects(name, ())) for name in names)
 
 
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
-    # string - path to the JSON file
-    __file_path = "file.json"
+    # string - path to the JSON file, or to the binary snapshot if it ends
+    # with .hbnb
+    __file_path = ("file.hbnb" if getenv("HBNB_FILE_FORMAT") == "binary"
+                   else "file.json")
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - the same objects partitioned by <class name>
+    __by_class = {}
+    # dictionary - objects (or raw records) by (<class name>,
+    # <fk attribute>) then fk value
+    __by_fk = {}
+    # dictionary - the sorted ids of the objects (and raw records) by
+    # <class name>, built by page() and kept up to date by new and delete
+    __sorted = {}
+    # dictionary - the __objects the indexes were built from
+    __indexed = None
+    # int - incremented by each change to the objects
+    __version = 0
+    # list - the Snapshot objects in use
+    __views = []
+    # set - names of the classes whose __by_class map is shared with a
+    # Snapshot, copied before it is changed
+    __frozen = set()
+    # dictionary - records read from the files but not turned into objects
+    # yet, by <class name> then <class name>.id, in lazy mode
+    __raw = {}
+    # dictionary - objects changed since the last save (None if deleted)
+    __dirty = {}
+    # dictionary - (object, JSON text of its to_dict() or its binary
+    # record) by <class name>.id
+    __fragments = {}
+    # dictionary - counters about the objects encoded by save()
+    __stats = {"saves": 0, "writes": 0, "encoded": 0, "reused": 0,
+               "last_encoded": 0}
+    # bool - append changes to the journal instead of rewriting the file
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    # bool - fsync the journal after each append
+    __fsync = getenv("HBNB_FILE_FSYNC") == "1"
+    # int - the journal is compacted once it is bigger than this many bytes
+    # and bigger than the JSON file itself
+    __compact_size = int(getenv("HBNB_FILE_COMPACT_SIZE", 1 << 20))
+    # bool - keep the records read from the files until they are used
+    __lazy = getenv("HBNB_FILE_LAZY") == "1"
+    # int - JSON files at least this big are parsed one object at a time
+    # instead of with json.load(), if HBNB_FILE_STREAM=1
+    __stream_size = (int(getenv("HBNB_FILE_STREAM_SIZE", 8 << 20))
+                     if getenv("HBNB_FILE_STREAM") == "1" else None)
+    # bool - one snapshot file per class, read when the class is used
+    __shards = getenv("HBNB_FILE_SHARDS") == "1"
+    # set - names of the classes whose shard was read
+    __loaded = set()
+    # set - names of the classes with records in the journal
+    __logged = set()
+    # bool - several processes share the files, see __write_shared()
+    __shared = getenv("HBNB_FILE_MULTIPROCESS") == "1"
+    # float - seconds a save() waits for concurrent ones to share its write
+    __group_window = float(getenv("HBNB_FILE_GROUP_WINDOW", 0))
+    # RWLock - guards the objects, their indexes and the dirty objects
+    __lock = RWLock()
+    # Lock - serializes the rebuilds of the indexes
+    __rebuild_lock = threading.Lock()
+    # Condition - guards the group commit counters below
+    __commit = threading.Condition()
+    # int - number of save() calls, and of those covered by a finished write
+    __requested = 0
+    __committed = 0
+    # bool - whether a thread is currently writing the file
+    __committing = False
+    # tuple - the __stat() of the files when they were last read or written
+    __signature = None
+    # int - size of the journal when it was last read or written
+    __log_offset = 0
+    # int - generation counter of the files when they were last read or
+    # written, in multi-process mode
+    __generation = 0
+
+    def __stale(self):
+        """tells if the indexes were not built from the current __objects:
+        it was replaced by another dictionary, or emptied
+
+        The other changes made directly to the dictionary returned by
+        all() are not noticed: objects are added and removed with new()
+        and delete()"""
+        return (FileStorage.__indexed is not self.__objects or
+                (not self.__objects and any(self.__by_class.values())))
+
+    def __partitions(self):
+        """returns __by_class, rebuilt if __objects was replaced or
+        emptied"""
+        if self.__stale():
+            with self.__rebuild_lock:
+                if self.__stale():
+                    FileStorage.__indexed = None
+                    FileStorage.__by_class = {}
+                    FileStorage.__by_fk = {}
+                    FileStorage.__sorted = {}
+                    FileStorage.__frozen = set()
+                    for key, value in list(self.__objects.items()):
+                        self.__by_class.setdefault(value.__class__.__name__,
+                                                   {})[key] = value
+                        self.__index(key, value)
+                    for records in self.__raw.values():
+                        for key, record in records.items():
+                            self.__index(key, record)
+                    FileStorage.__indexed = self.__objects
+        return self.__by_class
+
+    def __writable(self, name):
+        """returns the __by_class map of the class name, copied first if
+        a Snapshot shares it, lock held"""
+        partitions = self.__partitions()
+        if name in self.__frozen:
+            partitions[name] = dict(partitions.get(name, {}))
+            self.__frozen.discard(name)
+        return partitions.setdefault(name, {})
+
+    def __fk_value(self, obj, attr):
+        """returns the value of attr for an object or a raw record"""
+        if type(obj) is not dict:
+            return getattr(obj, attr, None)
+        if attr in obj:
+            return obj[attr]
+        return getattr(classes[obj["__class__"]], attr, None)
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def __index(self, key, obj, attrs=fk_attrs):
+        """adds obj (or a raw record) to the foreign key indexes"""
+        name = key.partition(".")[0]
+        for attr in attrs:
+            value = self.__fk_value(obj, attr)
+            if value is not None:
+                self.__by_fk.setdefault((name, attr), {}).setdefault(
+                    value, {})[key] = obj
+
+    def __unindex(self, key, obj, attr, value):
+        """removes obj from the index of attr for the given value"""
+        index = self.__by_fk.get((key.partition(".")[0], attr), {})
+        bucket = index.get(value)
+        if bucket is not None and bucket.get(key) is obj:
+            del bucket[key]
+            if not bucket:
+                del index[value]
+
+    def __store_raw(self, key, record):
+        """keeps record to turn it into an object when used, lock held"""
+        self.__drop_raw(key)
+        self.__raw.setdefault(record["__class__"], {})[key] = record
+        self.__index(key, record)
+
+    def __drop_raw(self, key):
+        """forgets the raw record stored under key, if any, lock held"""
+        record = self.__raw.get(key.partition(".")[0], {}).pop(key, None)
+        if record is not None:
+            for attr in fk_attrs:
+                self.__unindex(key, record, attr,
+                               self.__fk_value(record, attr))
+        return record
+
+    def __hydrate(self, key):
+        """turns the raw record stored under key into an object, lock held"""
+        record = self.__drop_raw(key)
+        if record is None:
+            return self.__objects.get(key)
+        obj = classes[record["__class__"]](**record)
+        partition = self.__writable(obj.__class__.__name__)
+        self.__objects[key] = obj
+        partition[key] = obj
+        self.__index(key, obj)
+        cached = self.__fragments.pop(key, None)
+        if (cached is not None and cached[0] is record and
+                obj.__dict__.keys() == record.keys() - {"__class__"}):
+            self.__fragments[key] = (obj, cached[1])
+        for view in self.__views:
+            partition = view.partitions.get(obj.__class__.__name__, {})
+            if partition.get(key) is record:
+                partition[key] = obj
+        return obj
+
+    def __hydrate_class(self, name):
+        """turns all the raw records of a class into objects"""
+        if self.__raw.get(name):
+            with self.__lock.write():
+                for key in list(self.__raw.get(name, {})):
+                    self.__hydrate(key)
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """returns the dictionary __objects
+
+        load and strategy are accepted for compatibility with DBStorage:
+        the relationships are index lookups here, there is nothing to
+        preload"""
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            self.__require([cls])
+            self.__hydrate_class(cls)
+            with self.__lock.read():
+                return dict(self.__partitions().get(cls, {}))
+        self.__require(classes)
+        for name in list(self.__raw):
+            self.__hydrate_class(name)
         return self.__objects
 
+    def iter_all(self, cls=None, batch_size=1000, load=(),
+                 strategy="selectin"):
+        """yields the objects, of class cls if given, without copying them
+        into a dictionary: the lazy records are turned into objects
+        batch_size at a time, when the iteration reaches them"""
+        if cls is not None:
+            names = [cls if isinstance(cls, str) else cls.__name__]
+        else:
+            names = list(classes)
+        self.__require(names)
+        for name in names:
+            with self.__lock.read():
+                keys = list(self.__partitions().get(name, {}))
+                keys.extend(self.__raw.get(name, {}))
+            for i in range(0, len(keys), batch_size):
+                with self.__lock.write():
+                    batch = [self.__hydrate(key)
+                             for key in keys[i:i + batch_size]]
+                for obj in batch:
+                    if obj is not None:
+                        yield obj
+
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
-            key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            self.__require([obj.__class__.__name__])
+            with self.__lock.write():
+                self.__new(obj)
+
+    def __new(self, obj):
+        """adds obj to __objects and to the indexes, lock held"""
+        key = obj.__class__.__name__ + "." + obj.id
+        partition = self.__writable(obj.__class__.__name__)
+        raw = self.__drop_raw(key)
+        old = self.__objects.get(key)
+        if old is not None:
+            for attr in fk_attrs:
+                self.__unindex(key, old, attr, getattr(old, attr, None))
+        elif raw is None and obj.__class__.__name__ in self.__sorted:
+            bisect.insort(self.__sorted[obj.__class__.__name__], obj.id)
+        self.__objects[key] = obj
+        partition[key] = obj
+        self.__index(key, obj)
+        self.__dirty[key] = obj
+        FileStorage.__version += 1
+
+    def bulk_new(self, objs):
+        """adds all objs then saves them with a single write"""
+        objs = list(objs)
+        self.__require(set(obj.__class__.__name__ for obj in objs))
+        with self.__lock.write():
+            for obj in objs:
+                self.__new(obj)
+        self.save()
+
+    def bulk_upsert(self, dicts):
+        """creates the objects described by dicts, as returned by
+        to_dict(), or updates the stored objects with the same id, then
+        saves them all with a single write"""
+        created = []
+        for values in dicts:
+            obj = classes[values["__class__"]](**values)
+            old = self.get(type(obj), obj.id)
+            if old is None:
+                created.append(obj)
+            else:
+                for name, value in given_attributes(obj, values).items():
+                    setattr(old, name, value)
+        self.bulk_new(created)
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict(add_passwd=True)
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        """serializes __objects to the JSON file (path: __file_path)
+
+        Concurrent calls are grouped: the first one writes the changes of
+        all the calls made before it started, the others wait for it."""
+        with self.__commit:
+            FileStorage.__requested += 1
+            ticket = self.__requested
+            while self.__committed < ticket and self.__committing:
+                self.__commit.wait()
+            if self.__committed >= ticket:
+                return
+            FileStorage.__committing = True
+        covered = self.__committed
+        try:
+            if self.__group_window:
+                time.sleep(self.__group_window)
+            with self.__commit:
+                target = self.__requested
+            if self.__shared:
+                self.__write_shared()
+            else:
+                self.__write()
+            covered = target
+        finally:
+            with self.__commit:
+                FileStorage.__committed = max(self.__committed, covered)
+                FileStorage.__committing = False
+                self.__commit.notify_all()
+
+    def __write(self):
+        """writes the changes made since the last write to disk"""
+        log_path = self.__file_path + ".log"
+        journal = self.__journal or os.path.exists(log_path)
+        lines = []
+        parts = None
+        with self.__lock.write():
+            if self.__shards and self.__logged - self.__loaded:
+                # the journal holds changes to shards we have not read
+                self.__load_shards(self.__logged - self.__loaded)
+            dirty = FileStorage.__dirty
+            FileStorage.__dirty = {}
+            self.__stats["saves"] = self.__requested
+            self.__stats["writes"] += 1
+            self.__stats["last_encoded"] = 0
+            for key in dirty:
+                self.__fragments.pop(key, None)
+            changed = self.__logged | {key.partition(".")[0] for key in dirty}
+            if journal:
+                lines = self.__records(dirty)
+                FileStorage.__logged = changed
+            snapshot_size = sum(self.__size(path)
+                                for name, path in self.__snapshots())
+            if (not self.__journal or
+                    self.__size(log_path) + sum(map(len, lines)) >
+                    max(self.__compact_size, snapshot_size)):
+                parts = {}
+                for name, path in self.__snapshots():
+                    if name is None:
+                        parts[name] = self.__parts(self.__objects.items(),
+                                                   self.__raw.values())
+                    elif name in changed:
+                        parts[name] = self.__parts(
+                            self.__partitions().get(name, {}).items(),
+                            [self.__raw.get(name, {})])
+                FileStorage.__fragments = {
+                    key: fragment for key, fragment in
+                    self.__fragments.items() if key in self.__objects or
+                    key in self.__raw.get(key.partition(".")[0], {})}
+        try:
+            if journal:
+                self.__append(log_path, lines)
+            if parts is not None:
+                self.__compact(log_path, parts)
+            with self.__lock.write():
+                if parts is not None:
+                    FileStorage.__logged = set()
+                FileStorage.__signature = self.__stat()
+                FileStorage.__log_offset = self.__size(log_path)
+        except BaseException:
+            with self.__lock.write():
+                for key, obj in dirty.items():
+                    self.__dirty.setdefault(key, obj)
+            raise
+
+    def __parts(self, objs, raws):
+        """returns the (key, fragment) of the objects and raw records"""
+        parts = []
+        for key, obj in objs:
+            parts.append((key, self.__fragment(key, obj)))
+        for records in raws:
+            for key, record in records.items():
+                parts.append((key, self.__raw_fragment(key, record)))
+        return parts
+
+    def __write_shared(self):
+        """writes like __write() while holding the lock file, after loading
+        what other processes committed since we last read the files"""
+        fd = self.__lock_file(fcntl.LOCK_EX)
+        try:
+            generation = self.__generation_of(fd)
+            with self.__lock.write():
+                if (generation != self.__generation or
+                        self.__stat() != self.__signature):
+                    self.__load_files(False)
+                # a process that died while appending left a torn record
+                # after the last good one: cut it off before appending
+                log_path = self.__file_path + ".log"
+                if self.__size(log_path) > self.__log_offset:
+                    with open(log_path, 'r+b') as f:
+                        f.truncate(self.__log_offset)
+            self.__write()
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, str(generation + 1).encode(), 0)
+            FileStorage.__generation = generation + 1
+        finally:
+            os.close(fd)
+
+    def __lock_file(self, operation):
+        """opens and flocks the lock file next to the JSON file, which holds
+        the generation counter bumped by each write"""
+        fd = os.open(self.__file_path + ".lock", os.O_RDWR | os.O_CREAT,
+                     0o644)
+        try:
+            fcntl.flock(fd, operation)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def __generation_of(self, fd):
+        """returns the generation counter stored in the locked file fd"""
+        data = os.pread(fd, 32, 0)
+        return int(data) if data.strip() else 0
+
+    def __size(self, path):
+        """returns the size of the file at path, 0 if there is none"""
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def __binary(self):
+        """tells if the snapshot is a binary one rather than JSON"""
+        return self.__file_path.endswith(".hbnb")
+
+    def __encode(self, record):
+        """returns the JSON text or the binary record of a record"""
+        if self.__binary():
+            return schema.encode(record["__class__"], record)
+        return json.dumps(record)
+
+    def __cached(self, key, obj):
+        """returns the fragment cached for obj in the current format"""
+        cached = self.__fragments.get(key)
+        if (cached is not None and cached[0] is obj and
+                isinstance(cached[1], bytes) == self.__binary()):
+            return cached[1]
+        return None
+
+    def __fragment(self, key, obj):
+        """returns the JSON text or binary record of obj, encoded again
+        only if it changed"""
+        fragment = self.__cached(key, obj)
+        if fragment is not None:
+            self.__stats["reused"] += 1
+            return fragment
+        if self.__binary():
+            fragment = schema.encode(obj.__class__.__name__, obj.__dict__)
+        else:
+            fragment = json.dumps(obj.to_dict(add_passwd=True))
+        self.__fragments[key] = (obj, fragment)
+        self.__stats["encoded"] += 1
+        self.__stats["last_encoded"] += 1
+        return fragment
+
+    def __raw_fragment(self, key, record):
+        """returns the JSON text or binary record of a raw record, encoded
+        once"""
+        fragment = self.__cached(key, record)
+        if fragment is not None:
+            return fragment
+        fragment = self.__encode(record)
+        self.__fragments[key] = (record, fragment)
+        return fragment
+
+    def stats(self):
+        """returns counters about the save() calls and encoded objects"""
+        with self.__lock.read():
+            return dict(self.__stats)
+
+    def __records(self, dirty):
+        """returns the journal lines recording the dirty objects"""
+        lines = []
+        for key, obj in dirty.items():
+            if obj is None:
+                lines.append('{"op": "delete", "key": ' + json.dumps(key) +
+                             '}\n')
+            else:
+                if self.__binary():
+                    text = json.dumps(obj.to_dict(add_passwd=True))
+                else:
+                    text = self.__fragment(key, obj)
+                lines.append('{"op": "upsert", "key": ' + json.dumps(key) +
+                             ', "obj": ' + text + '}\n')
+        return lines
+
+    def __append(self, log_path, lines):
+        """appends the journal lines to the journal"""
+        with open(log_path, 'a') as f:
+            f.write("".join(lines))
+            f.flush()
+            if self.__fsync:
+                os.fsync(f.fileno())
+
+    def __compact(self, log_path, parts):
+        """replaces each snapshot with its (key, fragment) parts, by shard
+        name, then empties the journal"""
+        for name, shard in parts.items():
+            path = self.__snapshot_path(name)
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            if self.__binary():
+                mode = 'wb'
+                data = schema.header() + b"".join(
+                    fragment for key, fragment in shard)
+            else:
+                mode = 'w'
+                data = "{" + ", ".join(json.dumps(key) + ": " + fragment
+                                       for key, fragment in shard) + "}"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+                f.flush()
+                if self.__fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        if os.path.exists(log_path):
+            open(log_path, 'w').close()
+
+    @contextmanager
+    def __no_write(self):
+        """waits for the write in progress, if any, and keeps save() from
+        starting another one until the with block ends: the files are not
+        read while they are being written"""
+        with self.__commit:
+            while self.__committing:
+                self.__commit.wait()
+            FileStorage.__committing = True
+        try:
+            yield
+        finally:
+            with self.__commit:
+                FileStorage.__committing = False
+                self.__commit.notify_all()
 
     def reload(self):
-        """deserializes the JSON file to __objects"""
+        """deserializes the JSON file and its journal to __objects"""
+        with self.__no_write():
+            self.__reload()
+
+    def __reload(self):
+        """loads the files, see reload()"""
+        if self.__shared:
+            fd = self.__lock_file(fcntl.LOCK_SH)
+            try:
+                with self.__lock.write():
+                    self.__load_files(True)
+                    FileStorage.__generation = self.__generation_of(fd)
+            finally:
+                os.close(fd)
+        else:
+            with self.__lock.write():
+                self.__load_files(True)
+
+    def __snapshot_path(self, name):
+        """returns the path of the shard of the class name, or of the single
+        snapshot if name is None"""
+        if name is None:
+            return self.__file_path
+        root, ext = os.path.splitext(self.__file_path)
+        return "{}.{}{}".format(root, name, ext)
+
+    def __snapshots(self):
+        """returns the (shard name, path) of the snapshot files"""
+        if not self.__shards:
+            return [(None, self.__file_path)]
+        return [(name, self.__snapshot_path(name)) for name in classes]
+
+    def __stat(self):
+        """returns (inode, size, mtime) of the snapshots and the journal"""
+        signature = []
+        paths = [path for name, path in self.__snapshots()]
+        for path in paths + [self.__file_path + ".log"]:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def __load_files(self, full, names=()):
+        """loads what changed in the files since they were last read or
+        written, everything if full, and the shards of the classes names;
+        unsaved changes are kept, lock held"""
+        FileStorage.__sorted = {}
+        pending = dict(self.__dirty)
+        signature = self.__stat()
+        log_path = self.__file_path + ".log"
+        old = self.__signature
+        # a journal that was removed, replaced or cut may have held records
+        # the snapshots do not: everything is read again
+        reset = (full or old is None or len(old) != len(signature) or
+                 (old[-1] is not None and
+                  (signature[-1] is None or
+                   old[-1][0] != signature[-1][0] or
+                   signature[-1][1] < self.__log_offset)))
+        FileStorage.__loaded = self.__loaded | set(names)
+        reread = [(i, name, path) for i, (name, path) in
+                  enumerate(self.__snapshots())
+                  if (name is None or name in self.__loaded) and
+                  (reset or name in names or old[i] != signature[i])]
+        seen = None
+        signature = list(signature)
+        if reread or reset:
+            seen = set()
+            failed = []
+            for i, name, path in reread:
+                if not self.__read_snapshot(path, pending, seen):
+                    # keep what is in memory and read the file again once
+                    # it changes
+                    failed.append((i, name, path))
+                    signature[i] = (old[i] if old is not None and
+                                    len(old) == len(signature) else None)
+            reread = [shard for shard in reread if shard not in failed]
+            FileStorage.__log_offset = 0
+            FileStorage.__logged = set()
+        FileStorage.__log_offset = self.__replay(log_path, self.__log_offset,
+                                                 pending, seen, full)
+        if seen is not None and not full:
+            shards = {name for i, name, path in reread}
+            keys = list(self.__objects)
+            for records in self.__raw.values():
+                keys.extend(records)
+            for key in keys:
+                if (key not in seen and key not in pending and
+                        (None in shards or key.partition(".")[0] in shards)):
+                    self.__delete(key)
+        FileStorage.__dirty = {key: obj for key, obj in pending.items()
+                               if self.__objects.get(key) is obj}
+        FileStorage.__signature = tuple(signature)
+
+    def __load_shards(self, names):
+        """reads the shards of the classes names, not read yet, and the
+        records of the journal about them, without reading again the other
+        shards; lock held"""
+        signature = self.__stat()
+        old = self.__signature
+        if (old is None or len(old) != len(signature) or
+                old[-1] != signature[-1]):
+            # the journal changed since we last read it
+            self.__load_files(False, names)
+            self.__add_to_views(names)
+            return
+        for name in names:
+            FileStorage.__sorted.pop(name, None)
+        dirty = dict(self.__dirty)
+        FileStorage.__loaded = self.__loaded | set(names)
+        old = list(old)
+        for i, (name, path) in enumerate(self.__snapshots()):
+            if name in names and self.__read_snapshot(path, dirty, set()):
+                old[i] = signature[i]
+        self.__replay(self.__file_path + ".log", 0, dirty, None, False,
+                      names, self.__log_offset)
+        FileStorage.__dirty = {key: obj for key, obj in dirty.items()
+                               if self.__objects.get(key) is obj}
+        FileStorage.__signature = tuple(old)
+        self.__add_to_views(names)
+
+    def __read_snapshot(self, path, pending, seen):
+        """loads the objects of the snapshot file at path and tells if it
+        was read entirely: False if it is missing or cannot be parsed,
+        lock held"""
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except:
-            pass
+            if self.__binary():
+                with open(path, 'rb') as f:
+                    for key, record, fragment in iter_records(
+                            f, None if self.__lazy else schema):
+                        self.__load(key, record, pending, fragment)
+                        seen.add(key)
+            else:
+                with open(path, 'r') as f:
+                    if (self.__stream_size is not None and
+                            os.fstat(f.fileno()).st_size >=
+                            self.__stream_size):
+                        items = iter_items(f)
+                    else:
+                        items = json.load(f).items()
+                    for key, record in items:
+                        self.__load(key, record, pending)
+                        seen.add(key)
+        except Exception:
+            return False
+        return True
+
+    def __require(self, names):
+        """loads the shards of the classes names not read yet, if the
+        snapshot is sharded"""
+        if not self.__shards or self.__loaded.issuperset(names):
+            return
+        with self.__no_write():
+            fd = self.__lock_file(fcntl.LOCK_SH) if self.__shared else None
+            try:
+                with self.__lock.write():
+                    missing = set(names) - self.__loaded
+                    if missing:
+                        self.__load_shards(missing)
+                        if fd is not None:
+                            FileStorage.__generation = self.__generation_of(
+                                fd)
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+    def __load(self, key, record, pending, fragment=None):
+        """stores the object described by record unless it has unsaved
+        changes or is already stored as is; fragment is the encoded record
+        if the file holds it in the current format, lock held"""
+        if key in pending:
+            return
+        obj = self.__objects.get(key)
+        if obj is None and self.__lazy:
+            if self.__raw.get(key.partition(".")[0], {}).get(key) != record:
+                self.__store_raw(key, record)
+            return
+        text = fragment if fragment is not None else self.__encode(record)
+        if obj is not None and self.__cached(key, obj) == text:
+            return
+        obj = classes[record["__class__"]](**record)
+        self.__new(obj)
+        if obj.__dict__.keys() == record.keys() - {"__class__"}:
+            self.__fragments[key] = (obj, text)
+
+    def __replay(self, log_path, offset, pending, seen, recover, names=None,
+                 end=None):
+        """applies the journal from offset and returns the offset of its
+        end; a torn or corrupt tail is cut off if recover. Only the records
+        of the classes names before the offset end are applied, if given"""
+        try:
+            f = open(log_path, 'rb')
+        except OSError:
+            return 0
+        with f:
+            f.seek(offset)
+            good = offset
+            for line in f:
+                if end is not None and good >= end:
+                    break
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("torn record")
+                    record = json.loads(line)
+                    key = record["key"]
+                    name = key.partition(".")[0]
+                    self.__logged.add(name)
+                    if self.__shards and name not in self.__loaded:
+                        pass
+                    elif names is not None and name not in names:
+                        pass
+                    elif record["op"] == "upsert":
+                        self.__load(key, record["obj"], pending)
+                        if seen is not None:
+                            seen.add(key)
+                    elif key not in pending:
+                        self.__delete(key)
+                        if seen is not None:
+                            seen.discard(key)
+                except (ValueError, KeyError, TypeError):
+                    break
+                good += len(line)
+            truncate = recover and os.fstat(f.fileno()).st_size != good
+        if truncate:
+            with open(log_path, 'r+b') as f:
+                f.truncate(good)
+        return good
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
-            key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            self.__require([obj.__class__.__name__])
+            with self.__lock.write():
+                self.__delete(obj.__class__.__name__ + '.' + obj.id)
+
+    def __delete(self, key):
+        """removes the object stored under key and its indexes, lock held"""
+        name, _, id = key.partition(".")
+        ids = self.__sorted.get(name)
+        if ids and (key in self.__objects or key in self.__raw.get(name, {})):
+            i = bisect.bisect_left(ids, id)
+            if i < len(ids) and ids[i] == id:
+                del ids[i]
+        if key in self.__objects:
+            obj = self.__objects.pop(key)
+            self.__writable(obj.__class__.__name__).pop(key, None)
+            for attr in fk_attrs:
+                self.__unindex(key, obj, attr, getattr(obj, attr, None))
+            self.__dirty[key] = None
+            FileStorage.__version += 1
+        elif self.__drop_raw(key) is not None:
+            self.__dirty[key] = None
+            FileStorage.__version += 1
+
+    def changed(self, obj, name, old):
+        """tracks the change and keeps the indexes up to date after
+        obj.<name> was set; old is absent if obj did not have it"""
+        if obj.__dict__.get("id") is None:
+            return
+        key = obj.__class__.__name__ + "." + obj.id
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock.write():
+            if self.__objects.get(key) is not obj:
+                return
+            self.__dirty[key] = obj
+            FileStorage.__version += 1
+            if name in fk_attrs:
+                self.__partitions()
+                if old is absent:
+                    # it was indexed under the default of the class
+                    old = getattr(type(obj), name, None)
+                self.__unindex(key, obj, name, old)
+                self.__index(key, obj, (name,))
+            if self.__views:
+                self.__preserve(key, obj, name, old)
+
+    def __preserve(self, key, obj, name, old):
+        """puts a copy of obj as it was before obj.<name> was set in the
+        Snapshots still holding obj, lock held"""
+        cls = obj.__class__.__name__
+        self.__writable(cls)
+        copy = None
+        for view in self.__views:
+            partition = view.partitions.get(cls, {})
+            if partition.get(key) is obj:
+                if copy is None:
+                    copy = object.__new__(obj.__class__)
+                    copy.__dict__.update(obj.__dict__)
+                    if old is absent:
+                        copy.__dict__.pop(name, None)
+                    else:
+                        copy.__dict__[name] = old
+                partition[key] = copy
+
+    def __view_partition(self, name):
+        """returns the objects of the class name for a Snapshot: the
+        __by_class map, shared until it is changed, or a copy holding the
+        raw records too; lock held"""
+        partition = self.__partitions().get(name, {})
+        records = self.__raw.get(name)
+        if not records:
+            self.__frozen.add(name)
+            return partition
+        partition = dict(partition)
+        partition.update(records)
+        return partition
+
+    def __add_to_views(self, names):
+        """gives the Snapshots taken before the shards of the classes names
+        were read the objects read, lock held"""
+        for view in self.__views:
+            for name in names:
+                if name not in view.partitions:
+                    view.partitions[name] = self.__view_partition(name)
+
+    def __fill(self, view, name, keys=None):
+        """makes view hold the objects of the class name, or only those of
+        keys: reads the shard of the class if it was not read when the view
+        was taken, and turns its raw records into objects"""
+        self.__require([name])
+        partition = view.partitions.get(name, {})
+        keys = [key for key in (partition if keys is None else keys)
+                if type(partition.get(key)) is dict]
+        if not keys:
+            return
+        with self.__lock.write():
+            for key in keys:
+                record = partition.get(key)
+                if type(record) is not dict:
+                    continue
+                if self.__raw.get(name, {}).get(key) is record:
+                    self.__hydrate(key)
+                else:
+                    # the record changed since: only the view holds it
+                    partition[key] = classes[record["__class__"]](**record)
+
+    @contextmanager
+    def snapshot(self):
+        """yields a Snapshot of the objects that the changes made until the
+        with block ends do not alter, without blocking the writers
+
+        The shards not read yet and the raw records are read and turned
+        into objects when the Snapshot uses them"""
+        with self.__lock.write():
+            partitions = {}
+            for name in set(self.__partitions()) | set(self.__raw):
+                partitions[name] = self.__view_partition(name)
+            view = Snapshot(self.__version, partitions, self.__fill)
+            self.__views.append(view)
+        try:
+            yield view
+        finally:
+            with self.__lock.write():
+                self.__views.remove(view)
+                if not self.__views:
+                    FileStorage.__frozen = set()
+
+    def by_fk(self, cls, attr, value):
+        """returns the objects of cls whose attribute attr equals value"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__require([cls])
+        with self.__lock.read():
+            self.__partitions()
+            found = list(self.__by_fk.get((cls, attr), {}).get(
+                value, {}).items())
+        if any(type(obj) is dict for key, obj in found):
+            with self.__lock.write():
+                found = [(key, self.__hydrate(key)) for key, obj in found]
+        return [obj for key, obj in found if obj is not None]
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
-        self.reload()
+        """loads the changes made to the files since they were last read
+        or written, if any"""
+        if not self.__shared and self.__stat() == self.__signature:
+            return
+        with self.__no_write():
+            if self.__shared:
+                fd = self.__lock_file(fcntl.LOCK_SH)
+                try:
+                    generation = self.__generation_of(fd)
+                    if (generation != self.__generation or
+                            self.__stat() != self.__signature):
+                        with self.__lock.write():
+                            self.__load_files(False)
+                            FileStorage.__generation = generation
+                finally:
+                    os.close(fd)
+            elif self.__stat() != self.__signature:
+                with self.__lock.write():
+                    self.__load_files(False)
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=(), strategy="selectin"):
         """retrieves one object"""
+        self.__require([cls.__name__])
         key = cls.__name__ + '.' + id
-        return self.all(cls).get(key)
+        obj = self.__objects.get(key)
+        if obj is None and key in self.__raw.get(cls.__name__, {}):
+            with self.__lock.write():
+                obj = self.__hydrate(key)
+        return obj
+
+    def __sorted_ids(self, name):
+        """returns the sorted ids of the objects of the class name, or None
+        if they no longer match the objects, lock held"""
+        ids = self.__sorted.get(name)
+        size = (len(self.__partitions().get(name, {})) +
+                len(self.__raw.get(name, {})))
+        return None if ids is None or len(ids) != size else ids
+
+    def __ids(self, name):
+        """returns the sorted ids of the objects of the class name, sorted
+        again if they no longer match the objects, write lock held"""
+        ids = self.__sorted_ids(name)
+        if ids is None:
+            partitions = self.__partitions()
+            ids = [key.partition(".")[2]
+                   for key in partitions.get(name, {})]
+            ids.extend(key.partition(".")[2]
+                       for key in self.__raw.get(name, {}))
+            ids.sort()
+            self.__sorted[name] = ids
+        return ids
+
+    def page(self, cls, after=None, limit=100, order_by="id", filters=None,
+             load=(), strategy="selectin"):
+        """returns a list of at most limit objects of class cls whose
+        attributes equal filters, ordered by order_by then id, that come
+        after the cursor after, and the cursor of the next page (None on
+        the last page), see models.engine.paging
+
+        In id order the page is read from the sorted ids of the class,
+        turning only its objects into instances; a filter on a foreign
+        key or another order picks the page among the objects found"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        filters = filters or {}
+        fks = [attr for attr in filters if attr in fk_attrs]
+        if fks or order_by != "id":
+            objs = (self.by_fk(name, fks[0], filters[fks[0]]) if fks
+                    else self.all(name).values())
+            return page_of(objs, after, limit, order_by, filters)
+        position = start(after, limit)
+        self.__require([name])
+        with self.__lock.read():
+            ids = self.__sorted_ids(name)
+            objs = (None if ids is None else
+                    self.__page_of_ids(name, ids, position, limit, filters,
+                                       False))
+        if objs is None:
+            with self.__lock.write():
+                objs = self.__page_of_ids(name, self.__ids(name), position,
+                                          limit, filters, True)
+        return next_page(objs, limit)
+
+    def __page_of_ids(self, name, ids, position, limit, filters, hydrate):
+        """returns the objects matching filters of at most limit + 1 of the
+        sorted ids that come after position, or None if one of them is a
+        raw record and hydrate is False (write lock needed), lock held"""
+        objs = []
+        i = 0 if position is None else bisect.bisect_right(ids, position[1])
+        while i < len(ids) and len(objs) <= limit:
+            key = name + "." + ids[i]
+            if key in self.__raw.get(name, {}):
+                if not hydrate:
+                    return None
+                obj = self.__hydrate(key)
+            else:
+                obj = self.__objects.get(key)
+            if obj is not None and matches(obj, filters):
+                objs.append(obj)
+            i += 1
+        return objs
 
     def count(self, cls=None):
         """count the number of objects in storage"""
-        return len(self.all(cls))
+        if cls is not None:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            self.__require([cls])
+            with self.__lock.read():
+                return (len(self.__partitions().get(cls, {})) +
+                        len(self.__raw.get(cls, {})))
+        self.__require(classes)
+        with self.__lock.read():
+            return len(self.__objects) + sum(map(len, self.__raw.values()))
+
+    def counts(self):
+        """returns the number of objects of each class by class name"""
+        self.__require(classes)
+        with self.__lock.read():
+            partitions = self.__partitions()
+            return {name: len(partitions.get(name, {})) +
+                    len(self.__raw.get(name, {})) for name in classes}
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+Contains the iter_items function
+"""
+
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_items(f, chunk_size=1 << 16):
+    """yields the (key, value) pairs of the JSON object stored in the text
+    file f one at a time, reading it chunk_size characters at a time"""
+    # the values share their key strings, as they do with json.load()
+    keys = {}
+    decoder = json.JSONDecoder(object_pairs_hook=lambda pairs: {
+        keys.setdefault(key, key): value for key, value in pairs})
+    buf = ""
+    eof = False
+    while not eof and not buf.strip():
+        more = f.read(chunk_size)
+        eof = not more
+        buf += more
+    pos = WHITESPACE.match(buf).end()
+    if buf[pos:pos + 1] != "{":
+        raise ValueError("expected a JSON object")
+    pos += 1
+    first = True
+    while True:
+        while True:
+            try:
+                pos = WHITESPACE.match(buf, pos).end()
+                if first and buf[pos:pos + 1] == "}":
+                    return
+                key, end = decoder.raw_decode(buf, pos)
+                end = WHITESPACE.match(buf, end).end()
+                if buf[end:end + 1] != ":":
+                    raise ValueError("expected ':' after a key")
+                end = WHITESPACE.match(buf, end + 1).end()
+                value, end = decoder.raw_decode(buf, end)
+                end = WHITESPACE.match(buf, end).end()
+                if buf[end:end + 1] not in (",", "}"):
+                    raise ValueError("expected ',' or '}' after a value")
+                break
+            except ValueError:
+                if eof:
+                    raise
+                more = f.read(chunk_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+        if not isinstance(key, str):
+            raise ValueError("expected a string key")
+        yield key, value
+        first = False
+        if buf[end] == "}":
+            return
+        pos = end + 1
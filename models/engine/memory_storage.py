@@ -0,0 +1,253 @@
+#!/usr/bin/python3
+"""
+Contains the MemoryStorage class
+"""
+
+from contextlib import contextmanager
+import json
+from models.base_model import absent, given_attributes
+from models.engine.file_storage import Snapshot, classes, fk_attrs
+from models.engine.paging import page_of
+from os import getenv
+import os
+import threading
+
+
+class MemoryStorage:
+    """keeps the instances in memory only, indexed by class and by foreign
+    key, for the tests and the short-lived jobs: save() writes nothing,
+    dump() writes a JSON file in the format of FileStorage on demand"""
+
+    # string - JSON file read by reload() and written by dump(), if any
+    __file_path = getenv("HBNB_MEMORY_FILE")
+    # dictionary - all the objects by <class name>.id
+    __objects = {}
+    # dictionary - the same objects by <class name> then <class name>.id
+    __by_class = {}
+    # dictionary - the objects by (<class name>, <fk attribute>), fk value
+    # then <class name>.id
+    __by_fk = {}
+    # int - incremented by each change to the objects
+    __version = 0
+    # list - the Snapshot objects in use
+    __views = []
+    # set - names of the classes whose __by_class map is shared with a
+    # Snapshot, copied before it is changed
+    __frozen = set()
+    # RLock - guards the objects and their indexes
+    __lock = threading.RLock()
+
+    def __index(self, key, obj):
+        """adds obj to the foreign key indexes, lock held"""
+        name = obj.__class__.__name__
+        for attr in fk_attrs:
+            value = obj.__dict__.get(attr)
+            if value is not None:
+                self.__by_fk.setdefault((name, attr), {}).setdefault(
+                    value, {})[key] = obj
+
+    def __unindex(self, key, name, attr, value):
+        """removes key from the index of attr for value, lock held"""
+        keys = self.__by_fk.get((name, attr), {}).get(value)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self.__by_fk[(name, attr)][value]
+
+    def __writable(self, name):
+        """returns the __by_class map of the class name, copied first if
+        a Snapshot shares it, lock held"""
+        if name in self.__frozen:
+            self.__by_class[name] = dict(self.__by_class.get(name, {}))
+            self.__frozen.discard(name)
+        return self.__by_class.setdefault(name, {})
+
+    def __new(self, obj):
+        """adds obj to __objects and to the indexes, lock held"""
+        key = obj.__class__.__name__ + "." + obj.id
+        self.__remove(key)
+        self.__objects[key] = obj
+        self.__writable(obj.__class__.__name__)[key] = obj
+        self.__index(key, obj)
+        MemoryStorage.__version += 1
+
+    def __remove(self, key):
+        """removes the object stored under key and its indexes, lock held"""
+        obj = self.__objects.pop(key, None)
+        if obj is not None:
+            name = obj.__class__.__name__
+            self.__writable(name).pop(key, None)
+            for attr in fk_attrs:
+                self.__unindex(key, name, attr, obj.__dict__.get(attr))
+            MemoryStorage.__version += 1
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """returns the dictionary __objects, or a dictionary of the objects
+        of class cls"""
+        if cls is None:
+            return self.__objects
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        with self.__lock:
+            return dict(self.__by_class.get(cls, {}))
+
+    def iter_all(self, cls=None, batch_size=1000, load=(),
+                 strategy="selectin"):
+        """yields the objects, of class cls if given"""
+        if cls is None:
+            objs = self.__objects
+        else:
+            objs = self.__by_class.get(
+                cls if isinstance(cls, str) else cls.__name__, {})
+        with self.__lock:
+            objs = list(objs.values())
+        for obj in objs:
+            yield obj
+
+    def get(self, cls, id, load=(), strategy="selectin"):
+        """retrieves one object"""
+        return self.__objects.get(cls.__name__ + "." + id)
+
+    def count(self, cls=None):
+        """count the number of objects in storage"""
+        if cls is None:
+            return len(self.__objects)
+        return len(self.__by_class.get(
+            cls if isinstance(cls, str) else cls.__name__, {}))
+
+    def counts(self):
+        """returns the number of objects of each class by class name"""
+        return {name: len(self.__by_class.get(name, {})) for name in classes}
+
+    def by_fk(self, cls, attr, value):
+        """returns the objects of cls whose attribute attr equals value"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        with self.__lock:
+            return list(self.__by_fk.get((cls, attr), {}).get(
+                value, {}).values())
+
+    def page(self, cls, after=None, limit=100, order_by="id", filters=None,
+             load=(), strategy="selectin"):
+        """returns a page of the objects of class cls whose attributes
+        equal filters and the cursor of the next one, see
+        models.engine.paging"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        filters = filters or {}
+        fks = [attr for attr in filters if attr in fk_attrs]
+        objs = (self.by_fk(name, fks[0], filters[fks[0]]) if fks
+                else self.iter_all(name))
+        return page_of(objs, after, limit, order_by, filters)
+
+    def new(self, obj):
+        """sets in __objects the obj with key <obj class name>.id"""
+        if obj is not None:
+            with self.__lock:
+                self.__new(obj)
+
+    def bulk_new(self, objs):
+        """adds all objs"""
+        with self.__lock:
+            for obj in objs:
+                self.__new(obj)
+
+    def bulk_upsert(self, dicts):
+        """creates the objects described by dicts, as returned by
+        to_dict(), or updates the stored objects with the same id"""
+        for values in dicts:
+            obj = classes[values["__class__"]](**values)
+            old = self.get(type(obj), obj.id)
+            if old is None:
+                self.new(obj)
+            else:
+                for name, value in given_attributes(obj, values).items():
+                    setattr(old, name, value)
+
+    def changed(self, obj, name, old):
+        """keeps the foreign key indexes and the snapshots up to date after
+        obj.<name> was set; old is absent if obj did not have it"""
+        if obj.__dict__.get("id") is None:
+            return
+        key = obj.__class__.__name__ + "." + obj.id
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock:
+            MemoryStorage.__version += 1
+            if name in fk_attrs:
+                self.__unindex(key, obj.__class__.__name__, name, old)
+                self.__index(key, obj)
+            if self.__views:
+                self.__preserve(key, obj, name, old)
+
+    def __preserve(self, key, obj, name, old):
+        """puts a copy of obj as it was before obj.<name> was set in the
+        Snapshots still holding obj, lock held"""
+        self.__writable(obj.__class__.__name__)
+        copy = None
+        for view in self.__views:
+            partition = view.partitions.get(obj.__class__.__name__, {})
+            if partition.get(key) is obj:
+                if copy is None:
+                    copy = object.__new__(obj.__class__)
+                    copy.__dict__.update(obj.__dict__)
+                    if old is absent:
+                        copy.__dict__.pop(name, None)
+                    else:
+                        copy.__dict__[name] = old
+                partition[key] = copy
+
+    def delete(self, obj=None):
+        """deletes obj from __objects if it's inside"""
+        if obj is not None:
+            with self.__lock:
+                self.__remove(obj.__class__.__name__ + "." + obj.id)
+
+    def save(self):
+        """does nothing: the objects are only kept in memory"""
+        pass
+
+    def dump(self, path=None):
+        """writes the objects to the JSON file path, HBNB_MEMORY_FILE by
+        default, in the format of FileStorage"""
+        path = path or self.__file_path
+        if path is None:
+            raise ValueError("no file to dump the objects to")
+        with self.__lock:
+            objs = {key: obj.to_dict(add_passwd=True)
+                    for key, obj in self.__objects.items()}
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(objs, f)
+        os.replace(tmp_path, path)
+
+    def reload(self):
+        """loads the objects of the HBNB_MEMORY_FILE file, if there is one"""
+        if self.__file_path is None or not os.path.exists(self.__file_path):
+            return
+        with open(self.__file_path, 'r') as f:
+            records = json.load(f)
+        with self.__lock:
+            for record in records.values():
+                self.__new(classes[record["__class__"]](**record))
+
+    def close(self):
+        """does nothing: there is no file to read again"""
+        pass
+
+    @contextmanager
+    def snapshot(self):
+        """yields a Snapshot of the objects that the changes made until the
+        with block ends do not alter: it shares the per-class maps, which
+        are copied before they are changed, and the changed objects are
+        copied into it first"""
+        with self.__lock:
+            view = Snapshot(self.__version, dict(self.__by_class))
+            self.__frozen.update(view.partitions)
+            self.__views.append(view)
+        try:
+            yield view
+        finally:
+            with self.__lock:
+                self.__views.remove(view)
+                if not self.__views:
+                    self.__frozen.clear()
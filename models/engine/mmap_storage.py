@@ -0,0 +1,239 @@
+#!/usr/bin/python3
+"""
+Contains the MmapStorage class
+"""
+
+from contextlib import contextmanager
+import json
+import mmap
+from models.engine.binary_format import LENGTH, iter_offsets, read_header
+from models.engine.file_storage import classes, fk_attrs
+from models.engine.paging import page_of
+import os
+
+
+class MmapStorage:
+    """read-only storage of the binary snapshot written by a FileStorage
+
+    The snapshot is memory-mapped and only the offset of each record is
+    kept: records are decoded into new instances each time they are used,
+    so the processes reading the same snapshot share its pages in the page
+    cache instead of each holding every object. The changes still in the
+    journal are read as they are small."""
+
+    # string - path to the binary snapshot
+    __file_path = "file.hbnb"
+    # dictionary - what was read from the files, replaced as a whole by
+    # reload(): "signature" of the files, "data" mapped, its "schema",
+    # "index" of the record offsets by <class name> then <class name>.id,
+    # "journal" records (None if deleted) by <class name>.id and the "fk"
+    # indexes built so far by (<class name>, <attribute>) then value
+    __state = None
+
+    def __stat(self):
+        """returns (inode, size, mtime) of the snapshot and the journal"""
+        signature = []
+        for path in (self.__file_path, self.__file_path + ".log"):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def __map(self):
+        """returns the mapped snapshot, its schema and the index of its
+        records, or (None, None, {}) if there is no snapshot"""
+        try:
+            f = open(self.__file_path, 'rb')
+        except OSError:
+            return None, None, {}
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None, None, {}
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        schema, pos = read_header(data)
+        index = {}
+        for offset, size in iter_offsets(data, pos):
+            key = schema.key(data, offset, size)
+            index.setdefault(key.partition(".")[0], {})[key] = offset
+        return data, schema, index
+
+    def __read_journal(self):
+        """returns the records of the journal by key, None if deleted"""
+        journal = {}
+        try:
+            f = open(self.__file_path + ".log", 'rb')
+        except OSError:
+            return journal
+        with f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("torn record")
+                    record = json.loads(line)
+                    if record["op"] == "upsert":
+                        journal[record["key"]] = record["obj"]
+                    else:
+                        journal[record["key"]] = None
+                except (ValueError, KeyError, TypeError):
+                    break
+        return journal
+
+    def reload(self):
+        """maps the snapshot again if it changed and reads the journal"""
+        signature = self.__stat()
+        state = self.__state
+        if state is None or state["signature"][0] != signature[0]:
+            data, schema, index = self.__map()
+        else:
+            data, schema, index = state["data"], state["schema"], \
+                state["index"]
+        MmapStorage.__state = {"signature": signature, "data": data,
+                               "schema": schema, "index": index,
+                               "journal": self.__read_journal(), "fk": {}}
+
+    def close(self):
+        """reloads the files if they changed since they were last read"""
+        if self.__state is None or self.__stat() != self.__state["signature"]:
+            self.reload()
+
+    def __record(self, state, key):
+        """returns the record stored under key, None if there is none"""
+        if key in state["journal"]:
+            return state["journal"][key]
+        return self.__decode(state, key)
+
+    def __decode(self, state, key):
+        """returns the record stored under key in the snapshot, if any"""
+        offset = state["index"].get(key.partition(".")[0], {}).get(key)
+        if offset is None:
+            return None
+        size = LENGTH.unpack_from(state["data"], offset - LENGTH.size)[0]
+        return state["schema"].decode(state["data"][offset:offset + size])[1]
+
+    def __keys(self, state, name):
+        """returns the keys of the objects of the class name"""
+        keys = [key for key in state["index"].get(name, {})
+                if key not in state["journal"]]
+        for key, record in state["journal"].items():
+            if record is not None and key.partition(".")[0] == name:
+                keys.append(key)
+        return keys
+
+    def __build(self, record):
+        """returns a new instance of the object described by record"""
+        return classes[record["__class__"]](**record)
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """returns a new dictionary of the objects, of class cls if given"""
+        state = self.__state
+        if cls is not None:
+            names = [cls if isinstance(cls, str) else cls.__name__]
+        else:
+            names = set(state["index"])
+            names.update(key.partition(".")[0] for key in state["journal"])
+        objs = {}
+        for name in names:
+            for key in self.__keys(state, name):
+                objs[key] = self.__build(self.__record(state, key))
+        return objs
+
+    def iter_all(self, cls=None, batch_size=1000, load=(),
+                 strategy="selectin"):
+        """yields new instances of the objects, of class cls if given,
+        decoding each record only when the iteration reaches it"""
+        state = self.__state
+        if cls is not None:
+            names = [cls if isinstance(cls, str) else cls.__name__]
+        else:
+            names = set(state["index"])
+            names.update(key.partition(".")[0] for key in state["journal"])
+        for name in names:
+            for key in self.__keys(state, name):
+                yield self.__build(self.__record(state, key))
+
+    def get(self, cls, id, load=(), strategy="selectin"):
+        """retrieves one object"""
+        record = self.__record(self.__state, cls.__name__ + "." + id)
+        return None if record is None else self.__build(record)
+
+    def count(self, cls=None):
+        """count the number of objects in storage"""
+        state = self.__state
+        if cls is not None:
+            return len(self.__keys(state, cls if isinstance(cls, str)
+                                   else cls.__name__))
+        names = set(state["index"])
+        names.update(key.partition(".")[0] for key in state["journal"])
+        return sum(len(self.__keys(state, name)) for name in names)
+
+    def counts(self):
+        """returns the number of objects of each class by class name"""
+        state = self.__state
+        return {name: len(self.__keys(state, name)) for name in classes}
+
+    def by_fk(self, cls, attr, value):
+        """returns the objects of cls whose attribute attr equals value"""
+        state = self.__state
+        name = cls if isinstance(cls, str) else cls.__name__
+        default = getattr(classes[name], attr, None)
+        index = state["fk"].get((name, attr))
+        if index is None:
+            index = {}
+            for key in state["index"].get(name, {}):
+                record = self.__decode(state, key)
+                index.setdefault(record.get(attr, default), []).append(key)
+            state["fk"][(name, attr)] = index
+        keys = [key for key in index.get(value, [])
+                if key not in state["journal"]]
+        for key, record in state["journal"].items():
+            if (record is not None and key.partition(".")[0] == name and
+                    record.get(attr, default) == value):
+                keys.append(key)
+        return [self.__build(self.__record(state, key)) for key in keys]
+
+    def page(self, cls, after=None, limit=100, order_by="id", filters=None,
+             load=(), strategy="selectin"):
+        """returns a page of the objects of class cls whose attributes
+        equal filters and the cursor of the next one, see
+        models.engine.paging"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        filters = filters or {}
+        fks = [attr for attr in filters if attr in fk_attrs]
+        objs = (self.by_fk(name, fks[0], filters[fks[0]]) if fks
+                else self.iter_all(name))
+        return page_of(objs, after, limit, order_by, filters)
+
+    @contextmanager
+    def snapshot(self):
+        """yields a MmapStorage that keeps reading the files as they are
+        now, even if close() or reload() read newer ones"""
+        view = MmapStorage()
+        # the instance attribute hides the class one for the view only
+        view.__state = self.__state
+        yield view
+
+    def changed(self, obj, name, old):
+        """does nothing: the instances are not tracked"""
+        pass
+
+    def new(self, obj):
+        """refuses to add obj: the storage is read-only"""
+        raise PermissionError("the storage is read-only")
+
+    def save(self):
+        """refuses to save: the storage is read-only"""
+        raise PermissionError("the storage is read-only")
+
+    def bulk_new(self, objs):
+        """refuses to add objs: the storage is read-only"""
+        raise PermissionError("the storage is read-only")
+
+    def bulk_upsert(self, dicts):
+        """refuses to add or update objects: the storage is read-only"""
+        raise PermissionError("the storage is read-only")
+
+    def delete(self, obj=None):
+        """refuses to delete obj: the storage is read-only"""
+        raise PermissionError("the storage is read-only")
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""
+Contains the cursors of the keyset pagination of the storage engines
+
+A page is the list of at most limit objects that come after the cursor
+in the (order_by, id) order, and the cursor of the next page, None on
+the last page. A cursor is the url-safe base64 of the JSON of the
+order_by name, the order_by value and the id of the last object of a
+page, opaque to the callers.
+"""
+
+import base64
+from datetime import datetime
+import heapq
+import json
+
+time = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def encode_cursor(obj, order_by="id"):
+    """returns the cursor of the page that starts after obj"""
+    value = None if order_by == "id" else getattr(obj, order_by)
+    if isinstance(value, datetime):
+        value = {"datetime": value.strftime(time)}
+    text = json.dumps([order_by, value, obj.id])
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, order_by="id"):
+    """returns the order_by value and the id of the object a cursor
+    starts after, ValueError if the cursor is not one of encode_cursor()
+    for order_by"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name, value, id = json.loads(text)
+        if isinstance(value, dict):
+            value = datetime.strptime(value["datetime"], time)
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("invalid cursor") from None
+    if name != order_by or not isinstance(id, str):
+        raise ValueError("invalid cursor")
+    return value, id
+
+
+def start(after, limit, order_by="id"):
+    """checks limit and returns the (order_by value, id) the page starts
+    after, None for the first page"""
+    if type(limit) is not int or limit < 1:
+        raise ValueError("limit must be a positive integer")
+    if after is None:
+        return None
+    return decode_cursor(after, order_by)
+
+
+def sort_key(order_by="id"):
+    """returns the function giving the position of an object in the
+    order_by order"""
+    if order_by == "id":
+        return lambda obj: obj.id
+    return lambda obj: (getattr(obj, order_by), obj.id)
+
+
+def matches(obj, filters):
+    """tells if the attributes of obj equal the values of filters"""
+    return all(getattr(obj, attr, None) == value
+               for attr, value in filters.items())
+
+
+def next_page(objs, limit, order_by="id"):
+    """returns the first limit objects of objs, fetched with one more
+    object than a page, and the cursor of the next page"""
+    if len(objs) > limit:
+        return objs[:limit], encode_cursor(objs[limit - 1], order_by)
+    return objs, None
+
+
+def page_of(objs, after=None, limit=100, order_by="id", filters=None):
+    """returns the page of the objects objs, for the storages without a
+    sorted index: the smallest limit + 1 objects after the cursor are
+    picked with a heap instead of sorting them all"""
+    position = start(after, limit, order_by)
+    key = sort_key(order_by)
+    if position is not None:
+        bound = position[1] if order_by == "id" else position
+        objs = (obj for obj in objs if key(obj) > bound)
+    objs = (obj for obj in objs if matches(obj, filters or {}))
+    return next_page(heapq.nsmallest(limit + 1, objs, key=key), limit,
+                     order_by)
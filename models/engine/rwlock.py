@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+Contains the RWLock class
+"""
+
+from contextlib import contextmanager
+import threading
+
+
+class RWLock:
+    """lock shared by many readers or held by a single writer
+
+    Waiting writers are served before new readers so that a steady flow
+    of reads cannot starve them. The lock is not reentrant."""
+
+    def __init__(self):
+        """Instantiate an unlocked RWLock object"""
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = False
+        self.__writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """holds the lock shared for the duration of the with block"""
+        with self.__cond:
+            while self.__writer or self.__writers_waiting:
+                self.__cond.wait()
+            self.__readers += 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """holds the lock exclusively for the duration of the with block"""
+        with self.__cond:
+            self.__writers_waiting += 1
+            while self.__writer or self.__readers:
+                self.__cond.wait()
+            self.__writers_waiting -= 1
+            self.__writer = True
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__writer = False
+                self.__cond.notify_all()
@@ -0,0 +1,21 @@
+#!/usr/bin/python3
+"""
+Contains the class SQLiteStorage
+"""
+
+from models.engine.db_storage import DBStorage
+from os import getenv
+
+
+class SQLiteStorage(DBStorage):
+    """stores the objects in a SQLite file through the SQLAlchemy columns
+    of the models, for single-node deployments that need indexed queries
+    without a MySQL server
+
+    DBStorage runs the SQLite connections in WAL mode with tuned pragmas
+    and indexes the foreign keys."""
+
+    def __init__(self):
+        """Instantiate a SQLiteStorage on the file HBNB_SQLITE_PATH"""
+        super().__init__("sqlite:///" + getenv("HBNB_SQLITE_PATH",
+                                               "hbnb.db"))
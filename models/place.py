@@ -3,11 +3,11 @@
 import models
 from models.base_model import BaseModel, Base
 from os import getenv
-import sqlalchemy
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Table
-from sqlalchemy.orm import relationship
 
 if models.storage_t == 'db':
+    from sqlalchemy import Column, String, Integer, Float, ForeignKey, Table
+    from sqlalchemy.orm import relationship
+
     place_amenity = Table('place_amenity', Base.metadata,
                           Column('place_id', String(60),
                                  ForeignKey('places.id', onupdate='CASCADE',
@@ -59,22 +59,16 @@ class Place(BaseModel, Base):
         def reviews(self):
             """getter attribute returns the list of Review instances"""
             from models.review import Review
-            review_list = []
-            all_reviews = models.storage.all(Review)
-            for review in all_reviews.values():
-                if review.place_id == self.id:
-                    review_list.append(review)
-            return review_list
+            return models.storage.by_fk(Review, "place_id", self.id)
 
         @property
         def amenities(self):
             """getter attribute returns the list of Amenity instances"""
             from models.amenity import Amenity
             amenity_list = []
-            all_amenities = models.storage.all(Amenity)
-            for amenity in all_amenities.values():
-                # if amenity.place_id == self.id:
-                if amenity.id in amenity_ids:
+            for amenity_id in self.amenity_ids:
+                amenity = models.storage.get(Amenity, amenity_id)
+                if amenity is not None:
                     amenity_list.append(amenity)
             return amenity_list
 
@@ -84,7 +78,7 @@ class Place(BaseModel, Base):
             from models.amenity import Amenity
             if isinstance(value, Amenity):
                 if value.id not in self.amenity_ids:
-                    self.amenity_ids.append(value.id)
+                    self.amenity_ids = self.amenity_ids + [value.id]
             elif isinstance(value, list):
                 self.amenity_ids = [
                         amenity.id
@@ -3,8 +3,8 @@
 import models
 from models.base_model import BaseModel, Base
 from os import getenv
-import sqlalchemy
-from sqlalchemy import Column, String, ForeignKey
+if models.storage_t == 'db':
+    from sqlalchemy import Column, String, ForeignKey
 
 
 class Review(BaseModel, Base):
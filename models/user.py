@@ -4,9 +4,9 @@ import models
 import hashlib
 from models.base_model import BaseModel, Base
 from os import getenv
-import sqlalchemy
-from sqlalchemy import Column, String
-from sqlalchemy.orm import relationship
+if models.storage_t == 'db':
+    from sqlalchemy import Column, String
+    from sqlalchemy.orm import relationship
 
 
 class User(BaseModel, Base):
@@ -31,6 +31,19 @@ class User(BaseModel, Base):
             kwargs['_password'] = self.hash_password(kwargs.pop('password'))
         super().__init__(*args, **kwargs)
 
+    if models.storage_t != 'db':
+        @property
+        def places(self):
+            """getter for list of place instances owned by the user"""
+            from models.place import Place
+            return models.storage.by_fk(Place, "user_id", self.id)
+
+        @property
+        def reviews(self):
+            """getter for list of review instances written by the user"""
+            from models.review import Review
+            return models.storage.by_fk(Review, "user_id", self.id)
+
     def hash_password(self, password):
         """Hashes the password using MD5"""
         return hashlib.md5(password.encode()).hexdigest()
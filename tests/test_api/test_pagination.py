@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+"""
+Contains the TestPaginationDocs and TestPagination classes
+"""
+
+from api.v1 import app as app_module
+from api.v1 import views
+from api.v1.views import amenities, cities, places, places_reviews, states
+from api.v1.views import users
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.engine.memory_storage import MemoryStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+import pep8
+import unittest
+from unittest import mock
+# modules - the modules holding the storage used by the views
+modules = (app_module, amenities, cities, places, places_reviews, states,
+           users)
+
+
+class TestPaginationDocs(unittest.TestCase):
+    """Tests to check the style of the pagination tests"""
+    def test_pep8_conformance_test_pagination(self):
+        """Test that tests/test_api/test_pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_jsonify_page_docstring(self):
+        """Test for the presence of docstrings in the pagination helpers"""
+        self.assertTrue(len(views.paginated.__doc__) >= 1)
+        self.assertTrue(len(views.jsonify_page.__doc__) >= 1)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestPagination(unittest.TestCase):
+    """Test the ?limit= and ?cursor= of the list endpoints"""
+    def setUp(self):
+        """Makes the API use an empty MemoryStorage"""
+        self.saved = (MemoryStorage._MemoryStorage__objects,
+                      MemoryStorage._MemoryStorage__by_class,
+                      MemoryStorage._MemoryStorage__by_fk,
+                      models.storage)
+        MemoryStorage._MemoryStorage__objects = {}
+        MemoryStorage._MemoryStorage__by_class = {}
+        MemoryStorage._MemoryStorage__by_fk = {}
+        self.storage = MemoryStorage()
+        models.storage = self.storage
+        for module in modules:
+            patcher = mock.patch.object(module, "storage", self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+    def tearDown(self):
+        """Restores the storages"""
+        (MemoryStorage._MemoryStorage__objects,
+         MemoryStorage._MemoryStorage__by_class,
+         MemoryStorage._MemoryStorage__by_fk,
+         models.storage) = self.saved
+
+    def walk(self, url, limit):
+        """returns the ids of the objects of all the pages of url, and the
+        number of pages"""
+        ids = []
+        pages = 0
+        query = {"limit": limit}
+        while query is not None:
+            response = self.client.get(url, query_string=query)
+            self.assertEqual(response.status_code, 200)
+            pages += 1
+            ids.extend(obj["id"] for obj in response.get_json())
+            cursor = response.headers.get("X-Next-Cursor")
+            query = None if cursor is None else {"limit": limit,
+                                                 "cursor": cursor}
+        return ids, pages
+
+    def test_headers(self):
+        """Test that a page links to the next one, and the last one does
+        not"""
+        states = [State(name=str(i)) for i in range(3)]
+        self.storage.bulk_new(states)
+        ids = sorted(state.id for state in states)
+        response = self.client.get("/api/v1/states?limit=2")
+        self.assertEqual([obj["id"] for obj in response.get_json()],
+                         ids[:2])
+        cursor = response.headers["X-Next-Cursor"]
+        link = response.headers["Link"]
+        self.assertTrue(link.startswith("<http://localhost/api/v1/states?"))
+        self.assertTrue(link.endswith('>; rel="next"'))
+        self.assertIn("limit=2", link)
+        response = self.client.get(link[1:link.index(">")])
+        self.assertEqual([obj["id"] for obj in response.get_json()],
+                         ids[2:])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+        self.assertNotIn("Link", response.headers)
+        response = self.client.get("/api/v1/states",
+                                   query_string={"cursor": cursor})
+        self.assertEqual([obj["id"] for obj in response.get_json()],
+                         ids[2:])
+
+    def test_bad_requests(self):
+        """Test that an invalid limit or cursor is a 400"""
+        self.storage.new(State(name="California"))
+        for query in ({"limit": "0"}, {"limit": "-1"}, {"limit": "ten"},
+                      {"limit": ""}, {"cursor": "not a cursor"},
+                      {"cursor": "eyJ4IjogMX0"}):
+            with self.subTest(query=query):
+                response = self.client.get("/api/v1/states",
+                                           query_string=query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.get_json())
+
+    def test_max_limit(self):
+        """Test that the page size is capped to max_limit"""
+        self.storage.bulk_new([Amenity(name=str(i)) for i in range(5)])
+        with mock.patch.object(views, "max_limit", 2):
+            response = self.client.get("/api/v1/amenities?limit=100")
+            self.assertEqual(len(response.get_json()), 2)
+            self.assertIn("limit=2", response.headers["Link"])
+            self.assertEqual(self.walk("/api/v1/amenities", 100)[1], 3)
+
+    def test_unpaginated(self):
+        """Test that the lists are whole without ?limit= nor ?cursor="""
+        states = [State(name=str(i)) for i in range(150)]
+        self.storage.bulk_new(states)
+        response = self.client.get("/api/v1/states")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(obj["id"] for obj in response.get_json()),
+                         sorted(state.id for state in states))
+        self.assertNotIn("X-Next-Cursor", response.headers)
+        self.assertNotIn("Link", response.headers)
+
+    def test_walk_endpoints(self):
+        """Test that walking the pages of each list endpoint returns each
+        object once, in id order, and only those of the parent"""
+        user = User(email="a@b.c", password="pwd")
+        state = State(name="California")
+        other = State(name="Nevada")
+        city = City(name="Napa", state_id=state.id)
+        place = Place(name="Loft", city_id=city.id, user_id=user.id)
+        self.storage.bulk_new([user, state, other, city, place])
+        self.storage.bulk_new(
+            [User(email=str(i)) for i in range(4)] +
+            [Amenity(name=str(i)) for i in range(5)] +
+            [State(name=str(i)) for i in range(3)] +
+            [City(name=str(i), state_id=state.id) for i in range(4)] +
+            [City(name=str(i), state_id=other.id) for i in range(2)] +
+            [Place(name=str(i), city_id=city.id, user_id=user.id)
+             for i in range(4)] +
+            [Review(text=str(i), place_id=place.id, user_id=user.id)
+             for i in range(5)])
+        for url, cls, filters in (
+                ("/api/v1/users", User, {}),
+                ("/api/v1/amenities", Amenity, {}),
+                ("/api/v1/states", State, {}),
+                ("/api/v1/states/{}/cities".format(state.id), City,
+                 {"state_id": state.id}),
+                ("/api/v1/cities/{}/places".format(city.id), Place,
+                 {"city_id": city.id}),
+                ("/api/v1/places/{}/reviews".format(place.id), Review,
+                 {"place_id": place.id})):
+            with self.subTest(url=url):
+                expected = sorted(
+                    obj.id for obj in self.storage.all(cls).values()
+                    if all(getattr(obj, attr) == value
+                           for attr, value in filters.items()))
+                ids, pages = self.walk(url, 2)
+                self.assertEqual(ids, expected)
+                self.assertEqual(pages, (len(expected) + 1) // 2)
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""
+Contains the TestBinaryFormatDocs and TestSchema classes
+"""
+
+from datetime import datetime
+import io
+import json
+import models
+from models.engine import binary_format
+from models.engine.file_storage import classes
+import os
+import pep8
+import unittest
+Schema = binary_format.Schema
+
+
+class TestBinaryFormatDocs(unittest.TestCase):
+    """Tests to check the documentation and style of binary_format"""
+    def test_pep8_conformance_binary_format(self):
+        """Test that models/engine/binary_format.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/binary_format.py',
+                                    'tests/test_models/test_engine/\
+test_binary_format.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_binary_format_docstrings(self):
+        """Test for the binary_format.py module and function docstrings"""
+        self.assertTrue(len(binary_format.__doc__) >= 1)
+        self.assertTrue(len(Schema.__doc__) >= 1)
+        for func in (Schema.encode, Schema.decode, Schema.of,
+                     binary_format.iter_records, binary_format.convert):
+            self.assertTrue(len(func.__doc__) >= 1)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestSchema(unittest.TestCase):
+    """Test the Schema class and the snapshot functions"""
+    def setUp(self):
+        """Builds the schema of the model classes"""
+        self.schema = Schema.of(classes)
+        self.paths = []
+
+    def tearDown(self):
+        """Removes the files written by the test"""
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def round_trip(self, name, attrs):
+        """Returns the record decoded from the encoded attrs"""
+        encoded = self.schema.encode(name, attrs)
+        self.assertEqual(len(encoded) - 4,
+                         binary_format.LENGTH.unpack(encoded[:4])[0])
+        return self.schema.decode(encoded[4:])
+
+    def test_columns(self):
+        """Test that the columns come from the class attributes"""
+        columns = dict(self.schema.classes)
+        self.assertEqual(columns["State"], [["id", "s"], ["created_at", "t"],
+                                            ["updated_at", "t"],
+                                            ["name", "s"]])
+        self.assertIn(["number_rooms", "i"], columns["Place"])
+        self.assertIn(["latitude", "f"], columns["Place"])
+        self.assertIn(["_password", "s"], columns["User"])
+        self.assertNotIn("amenity_ids", dict(columns["Place"]))
+
+    def test_round_trip(self):
+        """Test that any attribute value is decoded back as is"""
+        date = datetime(2017, 9, 28, 9, 50, 46, 772123)
+        attrs = {"id": "0c2f5a35-4f9f-4d6e-8f0e-2b4c4a3e3f71",
+                 "created_at": date, "updated_at": date,
+                 "city_id": "not-a-uuid", "user_id": "ÉTÉ \ud800",
+                 "name": "", "description": None, "number_rooms": 3,
+                 "number_bathrooms": 1 << 40, "max_guest": 1 << 70,
+                 "price_by_night": True, "latitude": 37,
+                 "longitude": -122.25, "amenity_ids": ["a", "b"],
+                 "extra": {"nested": [1]}}
+        key, record = self.round_trip("Place", attrs)
+        self.assertEqual(key, "Place." + attrs["id"])
+        self.assertEqual(record, dict(attrs, __class__="Place"))
+        self.assertIs(record["price_by_night"], True)
+        self.assertIs(type(record["latitude"]), int)
+
+    def test_string_dates(self):
+        """Test that dates in to_dict() format are stored as datetimes"""
+        attrs = {"id": "1", "created_at": "2017-09-28T09:50:46.772123",
+                 "updated_at": "yesterday"}
+        key, record = self.round_trip("State", attrs)
+        self.assertEqual(record["created_at"],
+                         datetime(2017, 9, 28, 9, 50, 46, 772123))
+        self.assertEqual(record["updated_at"], "yesterday")
+
+    def test_iter_records(self):
+        """Test that records are read back, with their encoded form only
+        if the file uses the given schema"""
+        f = io.BytesIO(self.schema.header() +
+                       self.schema.encode("State", {"id": "1", "name": "a"}) +
+                       self.schema.encode("City", {"id": "2"}))
+        records = list(binary_format.iter_records(f, self.schema))
+        self.assertEqual([(key, record) for key, record, encoded in records],
+                         [("State.1", {"id": "1", "name": "a",
+                                       "__class__": "State"}),
+                          ("City.2", {"id": "2", "__class__": "City"})])
+        self.assertEqual(records[1][2], self.schema.encode("City",
+                                                           {"id": "2"}))
+        f.seek(0)
+        other = Schema([["City", [["id", "s"]]]])
+        self.assertEqual([encoded for key, record, encoded in
+                          binary_format.iter_records(f, other)],
+                         [None, None])
+
+    def test_invalid(self):
+        """Test that foreign or truncated files raise ValueError"""
+        data = (self.schema.header() +
+                self.schema.encode("State", {"id": "1"}))
+        for text in (b"", b"{}", data[:len(binary_format.MAGIC) + 2],
+                     data[:-1], data + b"\0"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(binary_format.iter_records(io.BytesIO(text)))
+
+    def test_convert(self):
+        """Test that a JSON file is converted to binary and back"""
+        objs = {}
+        for obj in (classes["State"](name="California"),
+                    classes["Place"](name="Loft", amenity_ids=["a"]),
+                    classes["User"](email="a@b.c", password="pwd")):
+            objs[obj.__class__.__name__ + "." + obj.id] = obj.to_dict(
+                add_passwd=True)
+        self.paths = ["test_convert.json", "test_convert.hbnb",
+                      "test_convert2.json"]
+        with open(self.paths[0], "w") as f:
+            json.dump(objs, f)
+        binary_format.convert(self.paths[0], self.paths[1], self.schema)
+        binary_format.convert(self.paths[1], self.paths[2], self.schema)
+        with open(self.paths[2]) as f:
+            self.assertEqual(json.load(f), objs)
@@ -17,12 +17,57 @@ from models.user import User
 import json
 import os
 import pep8
+from sqlalchemy import event
+import shutil
+import tempfile
+import threading
 import unittest
+from unittest import mock
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
            "Review": Review, "State": State, "User": User}
 
 
+def queries(storage, function, *args, **kwargs):
+    """returns what function returns and the statements it sent to the
+    database of storage"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        """records the statements sent to the database"""
+        statements.append(statement)
+    engine = storage._DBStorage__engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        return function(*args, **kwargs), statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+class SQLiteTestCase(unittest.TestCase):
+    """Base of the tests of a storage on a temporary SQLite file"""
+    storage_class = DBStorage
+
+    def environ(self):
+        """returns the environment the storage is created with"""
+        return {"HBNB_DB_URL": "sqlite:///" + self.path, "HBNB_ENV": ""}
+
+    def setUp(self):
+        """Creates self.storage on a temporary database file"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "hbnb.db")
+        with mock.patch.dict(os.environ, self.environ()):
+            self.storage = self.storage_class()
+        self.storage.reload()
+        self.engine = self.storage._DBStorage__engine
+
+    def tearDown(self):
+        """Removes the database file"""
+        self.storage.close()
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+
 class TestDBStorageDocs(unittest.TestCase):
     """Tests to check the documentation and style of DBStorage class"""
     @classmethod
@@ -129,3 +174,353 @@ class TestMethods(unittest.TestCase):
         # Tests all state objs
         state_count = models.storage.count(State)
         self.assertEqual(state_count, 1)
+
+    def queries(self, function, *args, **kwargs):
+        """returns what function returns and the statements it sent"""
+        return queries(models.storage, function, *args, **kwargs)
+
+    def test_counts(self):
+        """Test that counts returns count of every class in one query"""
+        counts, statements = self.queries(models.storage.counts)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(sorted(counts), sorted(classes))
+        for name, cls in classes.items():
+            self.assertEqual(counts[name], models.storage.count(cls))
+        self.assertEqual(sum(counts.values()), models.storage.count())
+
+    def test_iter_all(self):
+        """Test that iter_all yields the same objects as all"""
+        state = State(name="Test")
+        models.storage.new(state)
+        models.storage.save()
+        objs = models.storage.iter_all(State, batch_size=1)
+        self.assertEqual(sorted(obj.id for obj in objs),
+                         sorted(obj.id for obj in
+                                models.storage.all(State).values()))
+        self.assertEqual(len(list(models.storage.iter_all())),
+                         models.storage.count())
+
+    def test_page(self):
+        """Test that page reads each page with one LIMIT query"""
+        states = [State(name="page {}".format(i % 2)) for i in range(5)]
+        models.storage.bulk_new(states)
+        ids, after = [], None
+        while True:
+            (objs, after), statements = self.queries(
+                models.storage.page, State, after=after, limit=2)
+            self.assertEqual(len(statements), 1)
+            self.assertIn("LIMIT", statements[0])
+            ids.extend(obj.id for obj in objs)
+            if after is None:
+                break
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), models.storage.count(State))
+        objs, after = models.storage.page(State, limit=2, order_by="name",
+                                          filters={"name": "page 1"})
+        self.assertEqual([obj.id for obj in objs],
+                         sorted(s.id for s in states if s.name == "page 1"))
+        self.assertIsNone(after)
+        with self.assertRaises(ValueError):
+            models.storage.page(State, after="garbage")
+
+    def test_load(self):
+        """Test that load preloads the relationships in constant queries"""
+        amenities = [Amenity(name=str(i)) for i in range(2)]
+        states = [State(name=str(i)) for i in range(3)]
+        for state in states:
+            for i in range(2):
+                city = City(name=str(i), state_id=state.id)
+                place = Place(name=str(i), city_id=city.id,
+                              user_id=self.user.id)
+                place.amenities.extend(amenities)
+                for obj in (city, place):
+                    models.storage.new(obj)
+            models.storage.new(state)
+        models.storage.save()
+
+        def walk(states):
+            """returns the names of the amenities of every place"""
+            return [amenity.name for state in states
+                    for city in state.cities for place in city.places
+                    for amenity in place.amenities]
+        for strategy, count in (("selectin", 4), ("joined", 1)):
+            with self.subTest(strategy=strategy):
+                models.storage.close()
+                loaded, statements = self.queries(
+                    models.storage.all, State, strategy=strategy,
+                    load=["cities.places.amenities"])
+                names, more = self.queries(walk, loaded.values())
+                self.assertEqual(len(statements), count)
+                self.assertEqual(more, [])
+                self.assertEqual(len(names), 12)
+        models.storage.close()
+        state, statements = self.queries(models.storage.get, State,
+                                         states[0].id, load=["cities"])
+        cities, more = self.queries(lambda: state.cities)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual((len(cities), more), (2, []))
+        models.storage.close()
+        loaded, statements = self.queries(models.storage.all, State)
+        names, more = self.queries(walk, loaded.values())
+        self.assertGreater(len(more), 4)
+
+    def test_pool(self):
+        """Test the pool settings, warm-up and checkout counters"""
+        env = {"HBNB_MYSQL_POOL_SIZE": "3", "HBNB_MYSQL_POOL_OVERFLOW": "0",
+               "HBNB_MYSQL_POOL_RECYCLE": "3600",
+               "HBNB_MYSQL_POOL_PRE_PING": "1",
+               "HBNB_MYSQL_POOL_WARMUP": "3", "HBNB_ENV": ""}
+        url = models.storage._DBStorage__engine.url
+        with mock.patch.dict(os.environ, env):
+            storage = DBStorage(url.render_as_string(hide_password=False))
+        pool = storage._DBStorage__engine.pool
+        self.assertEqual(pool.size(), 3)
+        self.assertEqual(pool._recycle, 3600)
+        self.assertTrue(pool._pre_ping)
+        storage.reload()
+        stats = storage.stats()
+        self.assertEqual(stats["connects"], 3)
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["peak_checked_out"], 3)
+        storage.get(User, self.user.id)
+        self.assertEqual(storage.stats()["checked_out"], 1)
+        storage.close()
+        stats = storage.stats()
+        self.assertEqual(stats["connects"], 3)
+        self.assertEqual(stats["checkins"], stats["checkouts"])
+        storage._DBStorage__engine.dispose()
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestReplicas(SQLiteTestCase):
+    """Test the routing of the queries to SQLite primary and replicas"""
+    def environ(self):
+        """returns the environment of a primary and two replicas files"""
+        urls = ["sqlite:///" + os.path.join(self.tmp, name + ".db")
+                for name in ("replica1", "replica2")]
+        return dict(super().environ(), HBNB_DB_REPLICAS=",".join(urls))
+
+    def setUp(self):
+        """Creates a storage on a primary and two replicas files"""
+        super().setUp()
+        self.replicas = self.storage._DBStorage__replicas
+        self.state = State(name="California")
+        self.storage.new(self.state)
+        self.storage.save()
+        self.storage.close()
+
+    def tearDown(self):
+        """Removes the database files"""
+        for engine in self.replicas:
+            engine.dispose()
+        super().tearDown()
+
+    def replicate(self, engine):
+        """copies the state to the replica engine"""
+        with engine.begin() as connection:
+            connection.execute(State.__table__.insert().values(
+                id=self.state.id, name=self.state.name,
+                created_at=self.state.created_at,
+                updated_at=self.state.updated_at))
+
+    def test_reads_go_to_replicas(self):
+        """Test that reads use the replicas and writes the primary"""
+        self.assertIsNone(self.storage.get(State, self.state.id))
+        self.assertEqual(self.storage.count(State), 0)
+        self.assertEqual(self.storage.counts()["State"], 0)
+        self.storage.close()
+        self.replicate(self.replicas[0])
+        found = []
+        for i in range(4):
+            found.append(self.storage.get(State, self.state.id) is not None)
+            self.assertEqual(self.storage.all(State) != {}, found[-1])
+            self.storage.close()
+        self.assertEqual(sorted(found), [False, False, True, True])
+        self.assertNotEqual(found[0], found[1])
+
+    def test_read_your_writes(self):
+        """Test that a session reads the primary after a write"""
+        self.assertIsNone(self.storage.get(State, self.state.id))
+        other = State(name="Nevada")
+        self.storage.new(other)
+        self.storage.save()
+        self.assertIsNotNone(self.storage.get(State, self.state.id))
+        self.assertEqual(self.storage.count(State), 2)
+        self.storage.close()
+        self.assertIsNone(self.storage.get(State, other.id))
+
+    def test_least_connections(self):
+        """Test that the least busy replica is chosen"""
+        self.storage._DBStorage__policy = "least_connections"
+        self.replicate(self.replicas[0])
+        with self.replicas[0].connect():
+            self.assertIsNone(self.storage.get(State, self.state.id))
+            self.storage.close()
+        with self.replicas[1].connect():
+            self.assertIsNotNone(self.storage.get(State, self.state.id))
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestGetCache(SQLiteTestCase):
+    """Test the cache of DBStorage.get on a SQLite file"""
+    def environ(self):
+        """returns the environment of a cache of 2 objects"""
+        return dict(super().environ(), HBNB_DB_CACHE_SIZE="2")
+
+    def setUp(self):
+        """Creates a storage with a cache of 2 objects"""
+        super().setUp()
+        self.states = [State(name=str(i)) for i in range(3)]
+        for state in self.states:
+            self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+
+    def get(self, state):
+        """returns the state read in a new session and the statements"""
+        self.storage.close()
+        return queries(self.storage, self.storage.get, State, state.id)
+
+    def test_hits(self):
+        """Test that a cached object is attached without a query"""
+        state = self.states[0]
+        self.assertEqual(len(self.get(state)[1]), 1)
+        cached, statements = self.get(state)
+        self.assertEqual(statements, [])
+        self.assertEqual(cached.to_dict(), state.to_dict())
+        self.assertIs(self.storage.get(State, state.id), cached)
+        self.storage.new(City(name="Napa", state_id=state.id))
+        self.storage.save()
+        self.assertEqual([city.name for city in cached.cities], ["Napa"])
+        stats = self.storage.stats()
+        self.assertEqual((stats["cache_hits"], stats["cache_misses"]),
+                         (1, 1))
+
+    def test_invalidation(self):
+        """Test that save and delete drop the cached object"""
+        state = self.states[0]
+        self.get(state)
+        loaded = self.get(state)[0]
+        loaded.name = "Nevada"
+        self.storage.save()
+        loaded, statements = self.get(state)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(loaded.name, "Nevada")
+        self.storage.delete(loaded)
+        self.storage.save()
+        self.assertIsNone(self.get(state)[0])
+
+    def test_save_during_miss(self):
+        """Test that a get() does not cache the values it read if a save()
+        committed new ones before it could cache them"""
+        state = self.states[0]
+        inspect = db_storage.inspect
+        calls = []
+
+        def rename():
+            """renames the state from another thread and session"""
+            loaded = self.storage.all(State)["State." + state.id]
+            loaded.name = "new"
+            self.storage.save()
+            self.storage.close()
+
+        def inspect_after_save(cls):
+            """lets the other thread save once the query was made"""
+            if not calls:
+                calls.append(cls)
+                thread = threading.Thread(target=rename)
+                thread.start()
+                thread.join()
+            return inspect(cls)
+        with mock.patch.object(db_storage, "inspect", inspect_after_save):
+            self.assertEqual(self.get(state)[0].name, "0")
+        loaded, statements = self.get(state)
+        self.assertEqual(loaded.name, "new")
+        self.assertEqual(len(statements), 1)
+
+    def test_lru(self):
+        """Test that the least recently used object is evicted"""
+        for state in self.states:
+            self.get(state)
+        self.assertEqual(len(self.get(self.states[0])[1]), 1)
+        self.assertEqual(self.get(self.states[2])[1], [])
+
+    def test_threads(self):
+        """Test concurrent gets from threads with their own sessions"""
+        errors = []
+
+        def reader():
+            """reads the states many times"""
+            try:
+                for i in range(50):
+                    for state in self.states:
+                        found = self.storage.get(State, state.id)
+                        if found.name != state.name:
+                            errors.append(found.name)
+                    self.storage.close()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=reader) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = self.storage.stats()
+        self.assertEqual(stats["cache_hits"] + stats["cache_misses"],
+                         8 * 50 * 3)
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestBulk(SQLiteTestCase):
+    """Test the bulk writes of DBStorage on a SQLite file"""
+    def setUp(self):
+        """Creates a storage on a temporary database"""
+        super().setUp()
+        self.commits = 0
+        event.listen(self.engine, "commit", self.commit)
+
+    def commit(self, conn):
+        """counts the commits"""
+        self.commits += 1
+
+    def test_bulk_new(self):
+        """Test that bulk_new inserts the objects in a single commit"""
+        states = [State(name=str(i)) for i in range(200)]
+        statements = queries(self.storage, self.storage.bulk_new, states)[1]
+        self.assertEqual(self.commits, 1)
+        self.assertLess(len(statements), 10)
+        self.assertEqual(self.storage.count(State), 200)
+
+    def test_bulk_upsert(self):
+        """Test that bulk_upsert inserts and updates in a single commit"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.commits = 0
+        updated = state.to_dict()
+        updated["name"] = "Nevada"
+        user = {"__class__": "User", "email": "a@b.c", "password": "pwd"}
+        dicts = [updated, user] + [{"__class__": "State", "name": str(i)}
+                                   for i in range(200)]
+        statements = queries(self.storage, self.storage.bulk_upsert,
+                             dicts)[1]
+        self.assertEqual(self.commits, 1)
+        self.assertLess(len(statements), 10)
+        self.assertEqual(state.name, "Nevada")
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name, "Nevada")
+        self.assertEqual(self.storage.count(State), 201)
+        users = list(self.storage.all(User).values())
+        self.assertEqual(users[0].password,
+                         users[0].hash_password("pwd"))
+        self.storage.close()
+        self.storage.bulk_upsert([{"__class__": "User", "id": users[0].id,
+                                   "first_name": "Betty"}])
+        self.storage.close()
+        user = self.storage.get(User, users[0].id)
+        self.assertEqual(user.first_name, "Betty")
+        self.assertEqual(user.email, "a@b.c")
+        self.assertEqual(user.password, users[0].hash_password("pwd"))
+        self.assertEqual(user.created_at, users[0].created_at)
+        self.assertEqual(user.updated_at, users[0].updated_at)
@@ -6,7 +6,7 @@ Contains the TestFileStorageDocs classes
 from datetime import datetime
 import inspect
 import models
-from models.engine import file_storage
+from models.engine import binary_format, file_storage
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -15,9 +15,12 @@ from models.review import Review
 from models.state import State
 from models.user import User
 import json
+import multiprocessing
 import os
 import pep8
+import threading
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -70,6 +73,15 @@ test_file_storage.py'])
 
 class TestFileStorage(unittest.TestCase):
     """Test the FileStorage class"""
+    def setUp(self):
+        """Makes the models use a FileStorage, whatever the engine"""
+        self.models_storage = models.storage
+        models.storage = FileStorage()
+
+    def tearDown(self):
+        """Restores the storage of the models"""
+        models.storage = self.models_storage
+
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_all_returns_dict(self):
         """Test that all returns the FileStorage.__objects attr"""
@@ -161,3 +173,801 @@ class TestFileStorage(unittest.TestCase):
         # All user count
         user_count = models.storage.count(User)
         self.assertEqual(user_count, 1)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_cls_partition(self):
+        """Test that all(cls) only returns the objects of that class"""
+        storage = FileStorage()
+        state = State(name="California")
+        city = City(name="Fremont")
+        storage.new(state)
+        storage.new(city)
+        states = storage.all(State)
+        self.assertIn("State." + state.id, states)
+        self.assertNotIn("City." + city.id, states)
+        self.assertEqual(states, storage.all("State"))
+        self.assertEqual(states, storage.all(State, load=["cities"]))
+        self.assertIs(storage.get(State, state.id, load=["cities"]), state)
+        for value in states.values():
+            self.assertIs(type(value), State)
+        storage.delete(state)
+        self.assertNotIn("State." + state.id, storage.all(State))
+        self.assertIsNone(storage.get(State, state.id))
+        self.assertIs(storage.get(City, city.id), city)
+        storage.delete(city)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_count_after_direct_change(self):
+        """Test that counts follow a replaced or emptied __objects, and
+        the changes made with new and delete"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        amenity = Amenity()
+        storage.new(amenity)
+        self.assertEqual(storage.count(Amenity), 1)
+        storage.all().clear()
+        self.assertEqual(storage.count(Amenity), 0)
+        self.assertEqual(storage.all(Amenity), {})
+        city = City()
+        storage.new(city)
+        state = State()
+        storage.delete(city)
+        storage.new(state)
+        self.assertEqual(storage.count(City), 0)
+        self.assertEqual(storage.count(State), 1)
+        self.assertEqual(storage.all(State), {"State." + state.id: state})
+        FileStorage._FileStorage__objects = save
+        self.assertEqual(storage.count(Amenity),
+                         len([v for v in save.values()
+                              if type(v) is Amenity]))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_counts(self):
+        """Test that counts returns the count of every class"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        for obj in (State(), State(), User()):
+            storage.new(obj)
+        counts = storage.counts()
+        FileStorage._FileStorage__objects = save
+        self.assertEqual(sorted(counts), sorted(classes))
+        self.assertEqual(counts["State"], 2)
+        self.assertEqual(counts["User"], 1)
+        self.assertEqual(counts["Place"], 0)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_iter_all(self):
+        """Test that iter_all yields the objects without a dictionary"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        objs = [State(), State(), User()]
+        for obj in objs:
+            storage.new(obj)
+        states = list(storage.iter_all(State, batch_size=1))
+        every = list(storage.iter_all("User")) + list(storage.iter_all())
+        with storage.snapshot() as snapshot:
+            frozen = list(snapshot.iter_all(State))
+        FileStorage._FileStorage__objects = save
+        self.assertEqual(states, objs[:2])
+        self.assertEqual(every, objs[2:] + objs)
+        self.assertEqual(frozen, objs[:2])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_by_fk(self):
+        """Test the foreign key indexes follow new, setattr and delete"""
+        storage = FileStorage()
+        state = State(name="California")
+        other = State(name="Nevada")
+        city = City(name="Fremont", state_id=state.id)
+        for obj in (state, other, city):
+            storage.new(obj)
+        self.assertEqual(storage.by_fk(City, "state_id", state.id), [city])
+        self.assertEqual(state.cities, [city])
+        city.state_id = other.id
+        self.assertEqual(storage.by_fk("City", "state_id", state.id), [])
+        self.assertEqual(other.cities, [city])
+        storage.delete(city)
+        self.assertEqual(other.cities, [])
+        storage.delete(state)
+        storage.delete(other)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_snapshot(self):
+        """Test that a snapshot does not see the later changes"""
+        storage = FileStorage()
+        state = State(name="California")
+        gone = State(name="Nevada")
+        storage.new(state)
+        storage.new(gone)
+        with storage.snapshot() as snapshot:
+            with storage.snapshot() as inner:
+                self.assertEqual(inner.version, snapshot.version)
+            count = snapshot.count()
+            states = snapshot.all(State)
+            state.name = "Oregon"
+            storage.delete(gone)
+            added = State(name="Utah")
+            storage.new(added)
+            self.assertEqual(snapshot.count(), count)
+            self.assertEqual(snapshot.all(State).keys(), states.keys())
+            self.assertEqual(snapshot.get(State, state.id).name,
+                             "California")
+            self.assertIs(snapshot.get(State, gone.id), gone)
+            self.assertIsNone(snapshot.get(State, added.id))
+            self.assertEqual(storage.get(State, state.id).name, "Oregon")
+            self.assertIsNone(storage.get(State, gone.id))
+            with storage.snapshot() as later:
+                self.assertGreater(later.version, snapshot.version)
+                self.assertEqual(later.get(State, state.id).name, "Oregon")
+                self.assertIs(later.get(State, added.id), added)
+                state.name = "Idaho"
+                self.assertEqual(later.get(State, state.id).name, "Oregon")
+                self.assertEqual(snapshot.get(State, state.id).name,
+                                 "California")
+        self.assertIs(storage.all(State)["State." + state.id], state)
+        storage.delete(state)
+        storage.delete(added)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_snapshot_of_unset_attribute(self):
+        """Test that a snapshot copy does not get the attributes that the
+        object did not have before the change"""
+        storage = FileStorage()
+        state = State()
+        user = User(email="a@b.c")
+        storage.new(state)
+        storage.new(user)
+        with storage.snapshot() as snapshot:
+            state.motto = "Eureka"
+            state.name = "California"
+            user.password = "pwd"
+            copy = snapshot.get(State, state.id)
+            self.assertIsNot(copy, state)
+            self.assertNotIn("motto", copy.__dict__)
+            self.assertNotIn("name", copy.__dict__)
+            self.assertEqual(copy.name, "")
+            copy = snapshot.get(User, user.id)
+            self.assertNotIn("password", copy.__dict__)
+            self.assertNotIn("_password", copy.__dict__)
+            self.assertEqual(copy.password, "")
+        storage.delete(state)
+        storage.delete(user)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_relationship_properties(self):
+        """Test the file mode relationship getters use the indexes"""
+        storage = FileStorage()
+        user = User(email="a@b.c", password="pwd")
+        city = City(name="Fremont")
+        place = Place(city_id=city.id, user_id=user.id)
+        review = Review(place_id=place.id, user_id=user.id, text="Nice")
+        amenity = Amenity(name="Wifi")
+        for obj in (user, city, place, review, amenity):
+            storage.new(obj)
+        place.amenities = amenity
+        self.assertEqual(city.places, [place])
+        self.assertEqual(user.places, [place])
+        self.assertEqual(user.reviews, [review])
+        self.assertEqual(place.reviews, [review])
+        self.assertEqual(place.amenities, [amenity])
+        self.assertEqual(Place.amenity_ids, [])
+        for obj in (user, city, place, review, amenity):
+            storage.delete(obj)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageSave(unittest.TestCase):
+    """Test how the FileStorage class writes and reads back its files"""
+    def setUp(self):
+        """Points the storage to an empty temporary file in journal mode"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects,
+                      FileStorage._FileStorage__journal,
+                      FileStorage._FileStorage__compact_size,
+                      FileStorage._FileStorage__shared,
+                      FileStorage._FileStorage__lazy,
+                      FileStorage._FileStorage__raw,
+                      FileStorage._FileStorage__stream_size,
+                      FileStorage._FileStorage__shards,
+                      FileStorage._FileStorage__loaded,
+                      models.storage)
+        self.path = "test_journal.json"
+        FileStorage._FileStorage__file_path = self.path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__raw = {}
+        FileStorage._FileStorage__shards = False
+        self.storage = FileStorage()
+        models.storage = self.storage
+
+    def tearDown(self):
+        """Restores the storage and removes the temporary files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects,
+         FileStorage._FileStorage__journal,
+         FileStorage._FileStorage__compact_size,
+         FileStorage._FileStorage__shared,
+         FileStorage._FileStorage__lazy,
+         FileStorage._FileStorage__raw,
+         FileStorage._FileStorage__stream_size,
+         FileStorage._FileStorage__shards,
+         FileStorage._FileStorage__loaded,
+         models.storage) = self.saved
+        for path in [self.path, self.path + ".log", self.path + ".lock"] + [
+                self.shard(name) for name in classes]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def shard(self, name):
+        """Returns the path of the shard of the class name"""
+        root, ext = os.path.splitext(self.path)
+        return "{}.{}{}".format(root, name, ext)
+
+    def cold(self):
+        """Forgets the objects and the shards read, like a new process"""
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        FileStorage._FileStorage__loaded = set()
+        self.storage.reload()
+
+    def reloaded(self):
+        """Returns the objects read back from the file and journal"""
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        self.storage.reload()
+        return self.storage.all()
+
+    def test_save_appends(self):
+        """Test that save only appends the changed objects"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(city)
+        self.storage.save()
+        with open(self.path + ".log") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["key"] for line in lines],
+                         ["State." + state.id, "City." + city.id])
+        state.name = "Nevada"
+        self.storage.delete(city)
+        self.storage.save()
+        objs = self.reloaded()
+        self.assertEqual(list(objs), ["State." + state.id])
+        self.assertEqual(objs["State." + state.id].name, "Nevada")
+
+    def test_torn_record(self):
+        """Test that a torn last record is dropped on reload"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        with open(self.path + ".log", "a") as f:
+            f.write('{"op": "upsert", "key": "State.')
+        self.assertEqual(list(self.reloaded()), ["State." + state.id])
+        with open(self.path + ".log") as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_compaction(self):
+        """Test that a big journal is folded into the JSON file"""
+        FileStorage._FileStorage__compact_size = 0
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.assertEqual(os.path.getsize(self.path + ".log"), 0)
+        with open(self.path) as f:
+            self.assertIn("State." + state.id, json.load(f))
+        self.assertEqual(list(self.reloaded()), ["State." + state.id])
+
+    def test_dirty_tracking(self):
+        """Test that save only encodes the objects changed since the last
+        save and reuses the JSON text of the others"""
+        FileStorage._FileStorage__journal = False
+        states = [State(name=str(i)) for i in range(3)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        self.assertEqual(self.storage.stats()["last_encoded"], 3)
+        self.storage.save()
+        self.assertEqual(self.storage.stats()["last_encoded"], 0)
+        states[0].name = "California"
+        self.storage.save()
+        self.assertEqual(self.storage.stats()["last_encoded"], 1)
+        objs = self.reloaded()
+        self.assertEqual(objs["State." + states[0].id].name, "California")
+        self.assertEqual(len(objs), 3)
+
+    def test_concurrent_saves(self):
+        """Test that concurrent saves keep every object and share writes"""
+        FileStorage._FileStorage__journal = False
+        window = FileStorage._FileStorage__group_window
+        FileStorage._FileStorage__group_window = 0.005
+        self.addCleanup(setattr, FileStorage,
+                        "_FileStorage__group_window", window)
+        writes = self.storage.stats()["writes"]
+
+        def create_states():
+            """Creates and saves states one by one"""
+            for i in range(20):
+                State(name=str(i)).save()
+        threads = [threading.Thread(target=create_states) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(self.storage.stats()["writes"] - writes, 160)
+        self.assertEqual(len(self.reloaded()), 160)
+
+    def test_close_applies_changes_on_disk(self):
+        """Test that close only reloads what changed on disk"""
+        FileStorage._FileStorage__journal = False
+        kept, changed, removed = (State(name=str(i)) for i in range(3))
+        for state in (kept, changed, removed):
+            self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.assertIs(self.storage.get(State, changed.id), changed)
+        with open(self.path) as f:
+            jo = json.load(f)
+        jo["State." + changed.id]["name"] = "Nevada"
+        del jo["State." + removed.id]
+        added = City(name="Fremont", state_id=kept.id)
+        jo["City." + added.id] = added.to_dict()
+        with open(self.path, "w") as f:
+            json.dump(jo, f)
+        self.storage.close()
+        self.assertIs(self.storage.get(State, kept.id), kept)
+        self.assertEqual(self.storage.get(State, changed.id).name, "Nevada")
+        self.assertIsNone(self.storage.get(State, removed.id))
+        self.assertEqual([city.id for city in kept.cities], [added.id])
+
+    def test_close_keeps_objects_of_unreadable_file(self):
+        """Test that close keeps the objects when the file changed on disk
+        is corrupt or deleted, and reads it again once it is fixed"""
+        FileStorage._FileStorage__journal = False
+        states = [State(name=str(i)) for i in range(3)]
+        for state in states:
+            state.save()
+        with open(self.path) as f:
+            text = f.read()
+        for damage in ("corrupt", "deleted"):
+            with self.subTest(damage=damage):
+                if damage == "corrupt":
+                    with open(self.path, "w") as f:
+                        f.write(text[:len(text) // 2])
+                else:
+                    os.remove(self.path)
+                self.storage.close()
+                self.assertEqual(self.storage.count(State), len(states))
+                states.append(State(name=damage))
+                states[-1].save()
+                self.assertEqual(len(self.reloaded()), len(states))
+        with open(self.path, "w") as f:
+            f.write(text[:len(text) // 2])
+        self.storage.close()
+        jo = {key: obj.to_dict() for key, obj in self.storage.all().items()}
+        jo["State." + states[0].id]["name"] = "Nevada"
+        with open(self.path, "w") as f:
+            json.dump(jo, f)
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, states[0].id).name,
+                         "Nevada")
+
+    def test_close_replays_new_journal_records(self):
+        """Test that close applies the records appended to the journal"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        other = State(name="Nevada")
+        with open(self.path + ".log", "a") as f:
+            f.write(json.dumps({"op": "upsert", "key": "State." + other.id,
+                                "obj": other.to_dict()}) + "\n")
+            f.write(json.dumps({"op": "delete",
+                                "key": "State." + state.id}) + "\n")
+        self.storage.close()
+        self.assertIsNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.get(State, other.id).name, "Nevada")
+
+    def test_close_during_write(self):
+        """Test that a close() from another thread while a save() writes
+        the files does not undo the changes being written"""
+        gone = State(name="California")
+        state = State(name="Nevada")
+        city = City(name="Napa", state_id=gone.id)
+        self.storage.bulk_new([gone, state, city])
+        compact = FileStorage._FileStorage__compact
+        thread = threading.Thread(target=FileStorage().close)
+
+        def compact_then_close(storage, log_path, parts):
+            """replaces the snapshot, gives another thread calling close()
+            the time to read the files before the journal is emptied, then
+            empties it"""
+            compact(storage, log_path + ".kept", parts)
+            thread.start()
+            thread.join(0.2)
+            compact(storage, log_path, {})
+        FileStorage._FileStorage__compact_size = 0
+        with mock.patch.object(FileStorage, "_FileStorage__compact",
+                               compact_then_close):
+            city.state_id = state.id
+            self.storage.delete(gone)
+            self.storage.save()
+        thread.join()
+        self.assertIsNone(self.storage.get(State, gone.id))
+        self.assertIs(self.storage.get(City, city.id), city)
+        self.assertEqual(state.cities, [city])
+        city.name = "Sonoma"
+        city.save()
+        objs = self.reloaded()
+        self.assertNotIn("State." + gone.id, objs)
+        self.assertEqual(objs["City." + city.id].state_id, state.id)
+        self.assertEqual(objs["City." + city.id].name, "Sonoma")
+
+    def create_states(self, worker):
+        """Creates and saves states from a separate process"""
+        for i in range(25):
+            State(name="{}-{}".format(worker, i)).save()
+            self.storage.close()
+
+    def test_processes_do_not_lose_updates(self):
+        """Test that processes sharing the files keep each other's objects"""
+        FileStorage._FileStorage__shared = True
+        context = multiprocessing.get_context("fork")
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__journal = journal
+                self.tearDown()
+                self.setUp()
+                FileStorage._FileStorage__journal = journal
+                FileStorage._FileStorage__shared = True
+                if journal:
+                    # a process died while appending its record
+                    State(name="seed").save()
+                    with open(self.path + ".log", "a") as f:
+                        f.write('{"op": "upsert", "key": "State.')
+                processes = [context.Process(target=self.create_states,
+                                             args=(i,)) for i in range(4)]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+                    self.assertEqual(process.exitcode, 0)
+                names = [obj.name for obj in self.reloaded().values()]
+                self.assertEqual(len(names), 100 + journal)
+                self.assertEqual(len(set(names)), 100 + journal)
+
+    def test_bulk(self):
+        """Test that bulk_new and bulk_upsert save with a single write"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__journal = journal
+                FileStorage._FileStorage__objects = {}
+                for path in (self.path, self.path + ".log"):
+                    if os.path.exists(path):
+                        os.remove(path)
+                places = [Place(name=str(i)) for i in range(50)]
+                writes = self.storage.stats()["writes"]
+                self.storage.bulk_new(places)
+                self.assertEqual(self.storage.stats()["writes"] - writes, 1)
+                updated = places[0].to_dict()
+                updated["name"] = "updated"
+                created = Place(name="created").to_dict()
+                self.storage.bulk_upsert([updated, created])
+                self.assertEqual(self.storage.stats()["writes"] - writes, 2)
+                self.assertEqual(places[0].name, "updated")
+                self.assertIs(self.storage.get(Place, places[0].id),
+                              places[0])
+                objs = self.reloaded()
+                self.assertEqual(len(objs), 51)
+                self.assertEqual(objs["Place." + places[0].id].name,
+                                 "updated")
+                self.assertEqual(objs["Place." + created["id"]].name,
+                                 "created")
+                place = self.storage.get(Place, places[1].id)
+                before = place.to_dict()
+                self.storage.bulk_upsert([{"__class__": "Place",
+                                           "id": place.id,
+                                           "number_rooms": 3}])
+                self.assertEqual(place.to_dict(),
+                                 dict(before, number_rooms=3))
+                self.assertEqual(
+                    self.reloaded()["Place." + place.id].to_dict(),
+                    dict(before, number_rooms=3))
+
+    def test_iter_all_lazy(self):
+        """Test that iter_all builds the lazy records batch by batch"""
+        FileStorage._FileStorage__journal = False
+        states = [State(name=str(i)) for i in range(5)]
+        for obj in states:
+            self.storage.new(obj)
+        self.storage.new(Amenity(name="Wifi"))
+        self.storage.save()
+        FileStorage._FileStorage__lazy = True
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        self.storage.reload()
+        objs = self.storage.iter_all(State, batch_size=2)
+        self.assertEqual(next(objs).__class__, State)
+        self.assertEqual(len(FileStorage._FileStorage__objects), 2)
+        names = [next(objs).name] + [obj.name for obj in objs]
+        self.assertEqual(len(names), 4)
+        self.assertEqual(len(FileStorage._FileStorage__objects), 5)
+        self.assertEqual(len(list(self.storage.iter_all())), 6)
+        FileStorage._FileStorage__lazy = False
+
+    def pages(self, cls, **kwargs):
+        """Returns the ids of all the pages of cls, in order"""
+        ids, after = [], None
+        while True:
+            objs, after = self.storage.page(cls, after=after, **kwargs)
+            ids.extend(obj.id for obj in objs)
+            if after is None:
+                return ids
+
+    def test_page(self):
+        """Test that page walks the sorted ids and follows new and delete"""
+        FileStorage._FileStorage__journal = False
+        states = [State(name=str(i % 3)) for i in range(7)]
+        city = City(name="Napa", state_id=states[0].id)
+        self.storage.bulk_new(states + [city])
+        ids = sorted(state.id for state in states)
+        self.assertEqual(self.pages(State, limit=3), ids)
+        self.assertEqual(self.storage.page(State, limit=7)[1], None)
+        self.assertEqual(self.pages(State, limit=2, order_by="name"),
+                         [state.id for state in sorted(
+                             states, key=lambda s: (s.name, s.id))])
+        self.assertEqual(self.pages(State, limit=1, filters={"name": "1"}),
+                         sorted(s.id for s in states if s.name == "1"))
+        self.assertEqual(self.pages(City, filters={"state_id": "x"}), [])
+        self.assertEqual(self.pages(City, filters={
+            "state_id": states[0].id}), [city.id])
+        state = State(name="new")
+        self.storage.new(state)
+        self.storage.delete(states[0])
+        self.assertEqual(self.pages(State, limit=4),
+                         sorted(ids[:ids.index(states[0].id)] + [state.id] +
+                                ids[ids.index(states[0].id) + 1:]))
+        cursor = self.storage.page(State, limit=1)[1]
+        for after, limit in ((cursor, 0), ("garbage", 1)):
+            with self.assertRaises(ValueError):
+                self.storage.page(State, after=after, limit=limit)
+        with self.assertRaises(ValueError):
+            self.storage.page(State, after=cursor, order_by="name")
+
+    def test_page_walk(self):
+        """Test that page walks the objects in id order under the read
+        lock once the ids are sorted"""
+        FileStorage._FileStorage__journal = False
+        states = [State(name=str(i)) for i in range(5)]
+        city = City(name="Napa", state_id=states[0].id)
+        self.storage.bulk_new(states + [city])
+        self.storage.page(State, limit=1)
+        lock = FileStorage._FileStorage__lock
+        with mock.patch.object(lock, "write", side_effect=AssertionError):
+            objs, after = self.storage.page(State, limit=3)
+            more, last = self.storage.page(State, after=after, limit=3)
+        self.assertEqual([obj.id for obj in objs + more],
+                         sorted(state.id for state in states))
+        self.assertIsNone(last)
+        self.assertEqual(self.storage.page(City, filters={
+            "state_id": states[0].id}), ([city], None))
+
+    def test_page_lazy(self):
+        """Test that page only builds the objects of the page"""
+        FileStorage._FileStorage__journal = False
+        states = [State(name=str(i)) for i in range(5)]
+        self.storage.bulk_new(states)
+        FileStorage._FileStorage__lazy = True
+        self.cold()
+        objs, after = self.storage.page(State, limit=2)
+        self.assertEqual([obj.id for obj in objs],
+                         sorted(state.id for state in states)[:2])
+        self.assertEqual(len(FileStorage._FileStorage__objects), 3)
+        self.assertEqual(len(self.pages(State, limit=2)), 5)
+        FileStorage._FileStorage__lazy = False
+
+    def test_lazy_reload(self):
+        """Test that lazy mode only builds the objects that are used"""
+        FileStorage._FileStorage__journal = False
+        state = State(name="California")
+        cities = [City(name=str(i), state_id=state.id) for i in range(3)]
+        for obj in [state] + cities:
+            self.storage.new(obj)
+        self.storage.new(Amenity(name="Wifi"))
+        self.storage.save()
+        FileStorage._FileStorage__lazy = True
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.count(), 5)
+        self.assertEqual(self.storage.count(City), 3)
+        self.assertEqual(len(FileStorage._FileStorage__objects), 0)
+        loaded = self.storage.get(State, state.id)
+        self.assertEqual(loaded.name, "California")
+        self.assertEqual(len(FileStorage._FileStorage__objects), 1)
+        self.assertEqual(sorted(city.name for city in loaded.cities),
+                         ["0", "1", "2"])
+        self.assertEqual(len(FileStorage._FileStorage__objects), 4)
+        loaded.name = "Nevada"
+        self.storage.save()
+        self.assertLessEqual(self.storage.stats()["last_encoded"], 4)
+        self.assertEqual(len(FileStorage._FileStorage__objects), 4)
+        FileStorage._FileStorage__lazy = False
+        objs = self.reloaded()
+        self.assertEqual(len(objs), 5)
+        self.assertEqual(objs["State." + state.id].name, "Nevada")
+
+    def test_lazy_snapshot(self):
+        """Test that a snapshot reads the shards and builds the objects
+        only when it uses them, as they were when it was taken"""
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__shards = True
+        FileStorage._FileStorage__loaded = set()
+        state = State(name="California")
+        cities = [City(name=str(i), state_id=state.id) for i in range(3)]
+        place = Place(name="Loft", city_id=cities[0].id)
+        self.storage.bulk_new([state, place] + cities)
+        FileStorage._FileStorage__lazy = True
+        self.cold()
+        self.storage.count(City)
+        with self.storage.snapshot() as snapshot:
+            self.assertEqual(FileStorage._FileStorage__loaded, {"City"})
+            self.assertEqual(FileStorage._FileStorage__objects, {})
+            self.assertEqual(snapshot.count(City), 3)
+            self.assertEqual(FileStorage._FileStorage__objects, {})
+            city = self.storage.get(City, cities[0].id)
+            city.name = "Napa"
+            self.storage.delete(self.storage.get(City, cities[1].id))
+            self.storage.delete(self.storage.get(Place, place.id))
+            self.assertIsNot(snapshot.get(City, city.id), city)
+            self.assertEqual(snapshot.get(City, city.id).name, "0")
+            self.assertEqual(len(FileStorage._FileStorage__objects), 1)
+            self.assertEqual(sorted(obj.name for obj in
+                                    snapshot.all(City).values()),
+                             ["0", "1", "2"])
+            self.assertIs(snapshot.get(City, cities[2].id),
+                          self.storage.get(City, cities[2].id))
+            self.assertEqual(list(snapshot.all(Place)),
+                             ["Place." + place.id])
+            self.assertEqual(snapshot.get(State, state.id).name,
+                             "California")
+            self.assertEqual(snapshot.count(), 5)
+        self.assertEqual(self.storage.count(), 3)
+
+    def test_streaming_reload(self):
+        """Test that a streamed JSON file loads the same objects"""
+        FileStorage._FileStorage__journal = False
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        FileStorage._FileStorage__stream_size = 0
+        objs = self.reloaded()
+        self.assertEqual(sorted(objs), sorted(["State." + state.id,
+                                               "City." + city.id]))
+        self.assertEqual(objs["City." + city.id].state_id, state.id)
+
+    def test_binary_snapshot(self):
+        """Test that a .hbnb path is saved and reloaded in binary"""
+        self.path = "test_journal.hbnb"
+        FileStorage._FileStorage__file_path = self.path
+        FileStorage._FileStorage__journal = False
+        state = State(name="California")
+        place = Place(name="Loft", city_id="c", number_rooms=3,
+                      latitude=37.5, amenity_ids=["a", "b"])
+        user = User(email="a@b.c", password="pwd")
+        for obj in (state, place, user):
+            self.storage.new(obj)
+        self.storage.save()
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(len(binary_format.MAGIC)),
+                             binary_format.MAGIC)
+        objs = self.reloaded()
+        self.assertEqual(len(objs), 3)
+        for obj in (state, place, user):
+            loaded = objs[obj.__class__.__name__ + "." + obj.id]
+            self.assertEqual(loaded.to_dict(add_passwd=True),
+                             obj.to_dict(add_passwd=True))
+        FileStorage._FileStorage__journal = True
+        objs["Place." + place.id].number_rooms = 4
+        self.storage.save()
+        self.assertTrue(os.path.exists(self.path + ".log"))
+        for lazy in (False, True):
+            FileStorage._FileStorage__lazy = lazy
+            objs = self.reloaded()
+            self.assertEqual(objs["Place." + place.id].number_rooms, 4)
+            self.assertEqual(objs["State." + state.id].created_at,
+                             state.created_at)
+
+    def test_sharded_save(self):
+        """Test that save only rewrites the shards of changed classes"""
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__shards = True
+        FileStorage._FileStorage__loaded = set()
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.shard("Place")))
+        inode = os.stat(self.shard("State")).st_ino
+        city.name = "Oakland"
+        self.storage.save()
+        self.assertEqual(os.stat(self.shard("State")).st_ino, inode)
+        with open(self.shard("City")) as f:
+            self.assertEqual(json.load(f)["City." + city.id]["name"],
+                             "Oakland")
+        self.cold()
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertEqual(list(self.storage.all(State)), ["State." + state.id])
+        self.assertEqual(FileStorage._FileStorage__loaded, {"State"})
+        self.assertEqual(list(FileStorage._FileStorage__objects),
+                         ["State." + state.id])
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.get(City, city.id).name, "Oakland")
+
+    def test_sharded_reads(self):
+        """Test that using a class reads its shard once, and no other"""
+        FileStorage._FileStorage__shards = True
+        read = []
+        read_snapshot = FileStorage._FileStorage__read_snapshot
+
+        def reading(storage, path, pending, seen):
+            """records the path of the snapshot read"""
+            read.append(path)
+            return read_snapshot(storage, path, pending, seen)
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__journal = journal
+                FileStorage._FileStorage__loaded = set()
+                state = State(name="California")
+                city = City(name="Napa", state_id=state.id)
+                place = Place(name="Loft", city_id=city.id)
+                self.storage.bulk_new([state, city, place])
+                self.cold()
+                del read[:]
+                with mock.patch.object(FileStorage,
+                                       "_FileStorage__read_snapshot",
+                                       reading):
+                    self.assertIn("City." + city.id,
+                                  self.storage.all(City))
+                    self.assertEqual(self.storage.get(Place, place.id).name,
+                                     "Loft")
+                    self.assertEqual(self.storage.all(City).keys(),
+                                     self.storage.all(City).keys())
+                    self.assertEqual(city.state_id, state.id)
+                    self.assertEqual(
+                        self.storage.get(State, state.id).cities[0].name,
+                        "Napa")
+                self.assertEqual(read, [self.shard("City"),
+                                        self.shard("Place"),
+                                        self.shard("State")])
+
+    def test_sharded_journal(self):
+        """Test that compacting the journal writes the shards it changed,
+        even those that were not read"""
+        FileStorage._FileStorage__shards = True
+        FileStorage._FileStorage__loaded = set()
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.shard("State")))
+        self.cold()
+        self.assertEqual(self.storage.get(State, state.id).name,
+                         "California")
+        self.cold()
+        FileStorage._FileStorage__compact_size = 0
+        self.storage.new(Amenity(name="Wifi"))
+        self.storage.save()
+        self.assertEqual(os.path.getsize(self.path + ".log"), 0)
+        self.assertTrue(os.path.exists(self.shard("State")))
+        self.assertFalse(os.path.exists(self.shard("City")))
+        self.cold()
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.get(State, state.id).name,
+                         "California")
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Contains the TestJsonStreamDocs and TestIterItems classes
+"""
+
+import io
+import json
+from models.engine import json_stream
+import pep8
+import unittest
+iter_items = json_stream.iter_items
+
+
+class TestJsonStreamDocs(unittest.TestCase):
+    """Tests to check the documentation and style of json_stream"""
+    def test_pep8_conformance_json_stream(self):
+        """Test that models/engine/json_stream.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/json_stream.py',
+                                    'tests/test_models/test_engine/\
+test_json_stream.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_json_stream_docstrings(self):
+        """Test for the json_stream.py module and function docstrings"""
+        self.assertTrue(len(json_stream.__doc__) >= 1)
+        self.assertTrue(len(iter_items.__doc__) >= 1)
+
+
+class TestIterItems(unittest.TestCase):
+    """Test the iter_items function"""
+    def items(self, text, chunk_size):
+        """Returns the list of pairs iter_items reads from text"""
+        return list(iter_items(io.StringIO(text), chunk_size))
+
+    def test_same_as_json_load(self):
+        """Test that any chunk size gives the pairs json.load gives"""
+        jo = {"State.1": {"id": "1", "name": "a {b}, \"c\": d"},
+              "Place.2": {"id": "2", "number_rooms": 12345,
+                          "latitude": -1.5e-3, "amenity_ids": ["x", "y"],
+                          "description": None, "nested": {"a": [{}]}},
+              "City.3": {}}
+        for indent in (None, 4):
+            text = json.dumps(jo, indent=indent)
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    self.assertEqual(self.items(text, chunk_size),
+                                     list(jo.items()))
+
+    def test_empty_object(self):
+        """Test that an empty object yields no pairs"""
+        self.assertEqual(self.items(" { } ", 1), [])
+
+    def test_invalid(self):
+        """Test that invalid or truncated documents raise ValueError"""
+        for text in ('', '[]', '{"a": 1,}', '{"a": 1', '{"a" 1}',
+                     '{"a": {"b": 1}', '{1: 2}'):
+            for chunk_size in (1, 64):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    with self.assertRaises(ValueError):
+                        self.items(text, chunk_size)
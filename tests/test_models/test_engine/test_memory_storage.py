@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+"""
+Contains the TestMemoryStorageDocs and TestMemoryStorage classes
+"""
+
+import inspect
+import json
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.engine import memory_storage
+from models.place import Place
+from models.state import State
+import os
+import pep8
+import unittest
+MemoryStorage = memory_storage.MemoryStorage
+
+
+class TestMemoryStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of MemoryStorage class"""
+    def test_pep8_conformance_memory_storage(self):
+        """Test that models/engine/memory_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/memory_storage.py',
+                                    'tests/test_models/test_engine/\
+test_memory_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_memory_storage_docstrings(self):
+        """Test for the presence of docstrings in MemoryStorage"""
+        self.assertTrue(len(memory_storage.__doc__) >= 1)
+        self.assertTrue(len(MemoryStorage.__doc__) >= 1)
+        for name, func in inspect.getmembers(MemoryStorage,
+                                             inspect.isfunction):
+            with self.subTest(function=name):
+                self.assertTrue(len(func.__doc__) >= 1)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestMemoryStorage(unittest.TestCase):
+    """Test the MemoryStorage class"""
+    def setUp(self):
+        """Makes the models use an empty MemoryStorage"""
+        self.saved = (MemoryStorage._MemoryStorage__objects,
+                      MemoryStorage._MemoryStorage__by_class,
+                      MemoryStorage._MemoryStorage__by_fk,
+                      MemoryStorage._MemoryStorage__file_path,
+                      models.storage)
+        self.path = "test_memory.json"
+        MemoryStorage._MemoryStorage__objects = {}
+        MemoryStorage._MemoryStorage__by_class = {}
+        MemoryStorage._MemoryStorage__by_fk = {}
+        MemoryStorage._MemoryStorage__file_path = self.path
+        self.storage = MemoryStorage()
+        models.storage = self.storage
+
+    def tearDown(self):
+        """Restores the storages and removes the temporary file"""
+        (MemoryStorage._MemoryStorage__objects,
+         MemoryStorage._MemoryStorage__by_class,
+         MemoryStorage._MemoryStorage__by_fk,
+         MemoryStorage._MemoryStorage__file_path,
+         models.storage) = self.saved
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_crud(self):
+        """Test new, all, get, count, delete and save"""
+        state = State(name="California")
+        state.save()
+        amenity = Amenity(name="Wifi")
+        self.storage.new(amenity)
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertEqual(self.storage.all(State),
+                         {"State." + state.id: state})
+        self.assertEqual(len(self.storage.all()), 2)
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count("Amenity"), 1)
+        self.assertEqual(self.storage.counts()["State"], 1)
+        self.assertEqual(list(self.storage.iter_all(Amenity)), [amenity])
+        state.delete()
+        self.assertIsNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.count(State), 0)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_fk_index(self):
+        """Test that the foreign key index follows the changes"""
+        state = State(name="California")
+        other = State(name="Nevada")
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.bulk_new([state, other, city])
+        self.assertEqual(state.cities, [city])
+        city.state_id = other.id
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other.cities, [city])
+        self.storage.delete(city)
+        self.assertEqual(other.cities, [])
+
+    def test_page(self):
+        """Test that page walks the objects in id order"""
+        states = [State(name=str(i)) for i in range(5)]
+        city = City(name="Napa", state_id=states[0].id)
+        self.storage.bulk_new(states + [city])
+        objs, after = self.storage.page(State, limit=3)
+        more, last = self.storage.page(State, after=after, limit=3)
+        self.assertEqual([obj.id for obj in objs + more],
+                         sorted(state.id for state in states))
+        self.assertIsNone(last)
+        self.assertEqual(self.storage.page(City, filters={
+            "state_id": states[0].id}), ([city], None))
+
+    def test_snapshot(self):
+        """Test that a snapshot does not see the later changes"""
+        state = State(name="California")
+        city = City(name="Napa", state_id=state.id)
+        self.storage.bulk_new([state, city])
+        with self.storage.snapshot() as snapshot:
+            self.assertIs(snapshot.partitions["State"],
+                          MemoryStorage._MemoryStorage__by_class["State"])
+            city.name = "Fremont"
+            city.motto = "Sunny"
+            self.storage.delete(state)
+            self.storage.new(State())
+            self.assertIsNot(snapshot.partitions["State"],
+                             MemoryStorage._MemoryStorage__by_class["State"])
+            self.assertEqual(list(snapshot.all(State)),
+                             ["State." + state.id])
+            copy = snapshot.get(City, city.id)
+            self.assertEqual(copy.name, "Napa")
+            self.assertNotIn("motto", copy.__dict__)
+            self.assertEqual(city.name, "Fremont")
+        self.assertEqual(self.storage.count(State), 1)
+
+    def test_dump_and_reload(self):
+        """Test that dump writes a file that reload reads back"""
+        place = Place(name="Loft")
+        self.storage.new(place)
+        self.storage.dump()
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["Place." + place.id]["name"],
+                             "Loft")
+        MemoryStorage._MemoryStorage__objects = {}
+        MemoryStorage._MemoryStorage__by_class = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(Place, place.id).name, "Loft")
+        MemoryStorage._MemoryStorage__file_path = None
+        with self.assertRaises(ValueError):
+            self.storage.dump()
+
+    def test_bulk_upsert(self):
+        """Test that bulk_upsert updates in place and creates"""
+        state = State(name="California")
+        self.storage.new(state)
+        updated = dict(state.to_dict(), name="Nevada")
+        created = State(name="Oregon").to_dict()
+        self.storage.bulk_upsert([updated, created])
+        self.assertEqual(state.name, "Nevada")
+        self.assertEqual(self.storage.get(State, created["id"]).name,
+                         "Oregon")
+        dates = (state.created_at, state.updated_at)
+        self.storage.bulk_upsert([{"__class__": "State", "id": state.id,
+                                   "name": "Utah"}])
+        self.assertEqual(state.name, "Utah")
+        self.assertEqual((state.created_at, state.updated_at), dates)
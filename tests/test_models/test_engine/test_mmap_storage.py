@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""
+Contains the TestMmapStorageDocs and TestMmapStorage classes
+"""
+
+import inspect
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.engine import mmap_storage
+from models.engine.file_storage import FileStorage
+from models.state import State
+import os
+import pep8
+import unittest
+MmapStorage = mmap_storage.MmapStorage
+
+
+class TestMmapStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of MmapStorage class"""
+    def test_pep8_conformance_mmap_storage(self):
+        """Test that models/engine/mmap_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/mmap_storage.py',
+                                    'tests/test_models/test_engine/\
+test_mmap_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_mmap_storage_docstrings(self):
+        """Test for the presence of docstrings in MmapStorage"""
+        self.assertTrue(len(mmap_storage.__doc__) >= 1)
+        self.assertTrue(len(MmapStorage.__doc__) >= 1)
+        for name, func in inspect.getmembers(MmapStorage,
+                                             inspect.isfunction):
+            with self.subTest(function=name):
+                self.assertTrue(len(func.__doc__) >= 1)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestMmapStorage(unittest.TestCase):
+    """Test the MmapStorage class on a snapshot written by FileStorage"""
+    def setUp(self):
+        """Writes a state with two cities to a binary snapshot"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects,
+                      FileStorage._FileStorage__journal,
+                      FileStorage._FileStorage__shards,
+                      FileStorage._FileStorage__raw,
+                      MmapStorage._MmapStorage__file_path,
+                      MmapStorage._MmapStorage__state,
+                      models.storage)
+        self.path = "test_mmap.hbnb"
+        FileStorage._FileStorage__file_path = self.path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__shards = False
+        FileStorage._FileStorage__raw = {}
+        MmapStorage._MmapStorage__file_path = self.path
+        MmapStorage._MmapStorage__state = None
+        self.writer = FileStorage()
+        self.state = State(name="California")
+        self.cities = [City(name=name, state_id=self.state.id)
+                       for name in ("Fremont", "Napa")]
+        for obj in [self.state] + self.cities:
+            self.writer.new(obj)
+        self.writer.save()
+        self.storage = MmapStorage()
+        self.storage.reload()
+        models.storage = self.storage
+
+    def tearDown(self):
+        """Restores the storages and removes the temporary files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects,
+         FileStorage._FileStorage__journal,
+         FileStorage._FileStorage__shards,
+         FileStorage._FileStorage__raw,
+         MmapStorage._MmapStorage__file_path,
+         MmapStorage._MmapStorage__state,
+         models.storage) = self.saved
+        for path in (self.path, self.path + ".log"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_reads(self):
+        """Test that the objects are decoded into new instances"""
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(City), 2)
+        states = self.storage.all(State)
+        self.assertEqual(list(states), ["State." + self.state.id])
+        state = self.storage.get(State, self.state.id)
+        self.assertIsNot(state, self.state)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+        self.assertIsNone(self.storage.get(State, "missing"))
+        self.assertEqual(sorted(city.name for city in state.cities),
+                         ["Fremont", "Napa"])
+        self.assertEqual(len(self.storage.all()), 3)
+        self.assertEqual(sorted(city.name for city in
+                                self.storage.iter_all(City)),
+                         ["Fremont", "Napa"])
+        self.assertEqual(len(list(self.storage.iter_all())), 3)
+        objs, after = self.storage.page(City, limit=1, order_by="name")
+        self.assertEqual([city.name for city in objs], ["Fremont"])
+        objs, after = self.storage.page(City, after=after, order_by="name")
+        self.assertEqual(([city.name for city in objs], after),
+                         (["Napa"], None))
+
+    def test_read_only(self):
+        """Test that writes are refused"""
+        with self.assertRaises(PermissionError):
+            self.storage.new(Amenity())
+        with self.assertRaises(PermissionError):
+            self.storage.save()
+        with self.assertRaises(PermissionError):
+            self.storage.delete(self.state)
+
+    def test_close_sees_changes(self):
+        """Test that close picks up the journal and new snapshots"""
+        FileStorage._FileStorage__journal = True
+        models.storage = self.writer
+        self.cities[0].name = "Oakland"
+        self.writer.delete(self.cities[1])
+        self.writer.new(City(name="Davis", state_id=self.state.id))
+        self.writer.save()
+        models.storage = self.storage
+        self.assertEqual(self.storage.count(City), 2)
+        self.storage.close()
+        state = self.storage.get(State, self.state.id)
+        self.assertEqual(sorted(city.name for city in state.cities),
+                         ["Davis", "Oakland"])
+        self.assertEqual(self.storage.count(City), 2)
+        FileStorage._FileStorage__journal = False
+        self.writer.new(Amenity(name="Wifi"))
+        models.storage = self.writer
+        self.writer.save()
+        models.storage = self.storage
+        self.assertEqual(os.path.getsize(self.path + ".log"), 0)
+        self.storage.close()
+        self.assertEqual(self.storage.count(), 4)
+        self.assertEqual(sorted(city.name for city in state.cities),
+                         ["Davis", "Oakland"])
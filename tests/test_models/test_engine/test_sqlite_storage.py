@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""
+Contains the TestSQLiteStorageDocs and TestSQLiteStorage classes
+"""
+
+import inspect
+import models
+from models.city import City
+from models.engine import sqlite_storage
+from models.state import State
+import pep8
+from sqlalchemy import exc, text
+from tests.test_models.test_engine.test_db_storage import SQLiteTestCase
+import unittest
+SQLiteStorage = sqlite_storage.SQLiteStorage
+
+
+class TestSQLiteStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of SQLiteStorage class"""
+    def test_pep8_conformance_sqlite_storage(self):
+        """Test that models/engine/sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/sqlite_storage.py',
+                                    'tests/test_models/test_engine/\
+test_sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_sqlite_storage_docstrings(self):
+        """Test for the presence of docstrings in SQLiteStorage"""
+        self.assertTrue(len(sqlite_storage.__doc__) >= 1)
+        self.assertTrue(len(SQLiteStorage.__doc__) >= 1)
+        for name, func in inspect.getmembers(SQLiteStorage,
+                                             inspect.isfunction):
+            with self.subTest(function=name):
+                self.assertTrue(len(func.__doc__) >= 1)
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestSQLiteStorage(SQLiteTestCase):
+    """Test the SQLiteStorage class on a temporary file"""
+    storage_class = SQLiteStorage
+
+    def environ(self):
+        """returns the environment of a storage on the temporary file"""
+        return {"HBNB_SQLITE_PATH": self.path, "HBNB_ENV": ""}
+
+    def test_pragmas(self):
+        """Test that the connections use WAL and enforce foreign keys"""
+        self.assertEqual(str(self.engine.url), "sqlite:///" + self.path)
+        with self.engine.connect() as connection:
+            pragma = connection.exec_driver_sql
+            self.assertEqual(pragma("PRAGMA journal_mode").scalar(), "wal")
+            self.assertEqual(pragma("PRAGMA foreign_keys").scalar(), 1)
+            self.assertEqual(pragma("PRAGMA synchronous").scalar(), 1)
+
+    def test_foreign_key_indexes(self):
+        """Test that the foreign key columns are indexed"""
+        with self.engine.connect() as connection:
+            indexes = set(connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )).scalars())
+        for name in ("ix_cities_state_id", "ix_places_city_id",
+                     "ix_places_user_id", "ix_reviews_place_id",
+                     "ix_reviews_user_id", "ix_place_amenity_amenity_id"):
+            with self.subTest(index=name):
+                self.assertIn(name, indexes)
+
+    def test_contract(self):
+        """Test new, save, get, count, all, delete and reload"""
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        for obj in (state, city):
+            self.storage.new(obj)
+        self.storage.save()
+        self.storage.close()
+        self.storage.reload()
+        loaded = self.storage.get(State, state.id)
+        self.assertEqual(loaded.name, "California")
+        self.assertEqual([c.id for c in loaded.cities], [city.id])
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(list(self.storage.all(City)), ["City." + city.id])
+        self.storage.delete(loaded.cities[0])
+        self.storage.save()
+        self.assertEqual(self.storage.count(City), 0)
+        self.storage.new(City(name="Napa", state_id="missing"))
+        with self.assertRaises(exc.IntegrityError):
+            self.storage.save()
+
+    def test_page(self):
+        """Test that page walks the rows in id order with the cursors"""
+        states = [State(name=str(i)) for i in range(5)]
+        city = City(name="Napa", state_id=states[0].id)
+        self.storage.bulk_new(states + [city])
+        self.storage.save()
+        objs, after = self.storage.page(State, limit=3)
+        more, last = self.storage.page(State, after=after, limit=3)
+        self.assertEqual([obj.id for obj in objs + more],
+                         sorted(state.id for state in states))
+        self.assertIsNone(last)
+        objs, last = self.storage.page(City, filters={
+            "state_id": states[0].id})
+        self.assertEqual(([obj.id for obj in objs], last), ([city.id], None))
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""
+Contains the TestEngineRegistry class
+"""
+
+import models
+import os
+import pep8
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+class TestEngineRegistry(unittest.TestCase):
+    """Test the storage engine registry of models/__init__.py"""
+    def test_pep8_conformance_models_init(self):
+        """Test that models/__init__.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/__init__.py',
+                                    'tests/test_models/test_models_init.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_docstrings(self):
+        """Test for the presence of docstrings in models/__init__.py"""
+        self.assertTrue(len(models.__doc__) >= 1)
+        self.assertTrue(len(models.find_engine.__doc__) >= 1)
+
+    def test_find_engine(self):
+        """Test that find_engine resolves names, paths and unknown names"""
+        self.assertEqual(models.find_engine("sqlite"),
+                         ("models.engine.sqlite_storage:SQLiteStorage", "db"))
+        self.assertEqual(models.find_engine(None), models.engines["file"])
+        self.assertEqual(models.find_engine("pkg.engine:Engine"),
+                         ("pkg.engine:Engine", "file"))
+        self.assertEqual(models.find_engine("no_such_engine"),
+                         models.engines["file"])
+
+    def test_lazy_storage(self):
+        """Test that importing models neither imports an engine nor
+        SQLAlchemy, and that the storage is created on first access"""
+        code = ("import sys\n"
+                "import models\n"
+                "print('sqlalchemy' in sys.modules, "
+                "'storage' in vars(models))\n"
+                "print(type(models.storage).__name__, "
+                "models.storage is models.storage)\n")
+        for name, env, loaded in (
+                ("memory", {"HBNB_TYPE_STORAGE": "memory"}, "MemoryStorage"),
+                ("path", {"HBNB_TYPE_STORAGE":
+                          "models.engine.memory_storage:MemoryStorage"},
+                 "MemoryStorage")):
+            with self.subTest(engine=name):
+                env = dict(os.environ, **env)
+                env.pop("HBNB_MEMORY_FILE", None)
+                out = subprocess.check_output(
+                    [sys.executable, "-c", code], env=env,
+                    universal_newlines=True)
+                self.assertEqual(out.split(),
+                                 ["False", "False", loaded, "True"])
+
+    def test_sql_models(self):
+        """Test that the mapped models can be used before the storage is,
+        which is still created on first access"""
+        tmp = tempfile.mkdtemp()
+        code = ("import models\n"
+                "from models.state import State\n"
+                "State(name='California')\n"
+                "print('storage' in vars(models))\n")
+        env = dict(os.environ, HBNB_TYPE_STORAGE="sqlite",
+                   HBNB_SQLITE_PATH=os.path.join(tmp, "hbnb.db"))
+        try:
+            out = subprocess.check_output(
+                [sys.executable, "-c", code], env=env,
+                universal_newlines=True)
+            self.assertEqual(out.split(), ["False"])
+            self.assertFalse(os.path.exists(env["HBNB_SQLITE_PATH"]))
+        finally:
+            shutil.rmtree(tmp)